@@ -3,8 +3,10 @@ from .argutil import (
     save,
     get_module,
     get_parser,
+    parse_args,
     callable,
     ParserDefinition,
     GLOBAL_ENV,
 ) 
+from .registry import Registry
 from .working_directory import WorkingDirectory, pushd
@@ -8,17 +8,33 @@ from argparse import (
     ArgumentDefaultsHelpFormatter,
     SUPPRESS
 )
-from .working_directory import WorkingDirectory
+from .working_directory import resolve_path
+from . import backend
+from . import bulk
+from . import cache
+from . import coercion
+from . import compiler
+from . import daemon
 from . import defaults
+from . import fileio
+from . import handlers
+from . import instrument
+from . import plugins
+from . import results
+from . import schema
+from . import shards
+from . import stream
+from .lazy import LazySubParsersAction
 import json
-import inspect
 import os
-import shutil
+import sys
+import threading
+from contextlib import contextmanager
 from sys import exit
-from .deepcopy import deepcopy
+from .inheritance import resolve_definition
+from .registry import Environment, Registry, get_maps
 from .primitives import primitives
 import logging
-import jsonschema
 
 logger = logging.getLogger('argutil')
 logger.setLevel(logging.ERROR)
@@ -37,15 +53,21 @@ class RawWithDefaultsFormatter(
 
 
 def get_file(**kwargs):
-    stackdepth = kwargs.get('__stackdepth__', kwargs.get('__stackdepth__', 1))
-    return inspect.stack()[stackdepth].filename
+    stackdepth = kwargs.get('__stackdepth__', 1)
+    try:
+        frame = sys._getframe(stackdepth)
+    except AttributeError:
+        frame = sys.exc_info()[2].tb_frame
+        for _ in range(stackdepth):
+            frame = frame.f_back
+    return frame.f_code.co_filename
 
 
 def load(json_file, mode='a'):
     if mode in 'ar':
         if os.path.isfile(json_file):
-            with open(json_file, 'r') as f:
-                return json.load(f)
+            with open(json_file, 'rb') as f:
+                return backend.loads(f.read())
         elif mode == 'r':
             raise FileNotFoundError('file could not be read: ' + json_file)
     if mode in 'wca':
@@ -54,32 +76,59 @@ def load(json_file, mode='a'):
 
 
 def save(json_data, json_file):
-    with open(json_file, 'w') as f:
-        f.write(json.dumps(json_data, indent=2))
+    text = json.dumps(json_data, indent=2)
+    fileio.write_if_changed(json_file, text)
+    return text
 
 
-def validate(json_data_or_file):
+def validate(json_data_or_file, cache_dir=None):
     if isinstance(json_data_or_file, dict):
-        json_data = json_data_or_file
+        return schema.check(json_data_or_file)
     elif (
         isinstance(json_data_or_file, str) and
         os.path.isfile(json_data_or_file)
     ):
-        json_data = load(json_data_or_file, 'r')
-    jsonschema.validate(json_data, commandline_schema)
-    return json_data
+        return schema.validate_file(json_data_or_file, cache_dir)
+    raise FileNotFoundError(
+        'file could not be read: {}'.format(json_data_or_file)
+    )
+
+
+GLOBAL_ENV = Registry()
+RESOLVED_DEFINITIONS = {}
+_resolved_lock = threading.Lock()
+
+instrument.enable_from_environ()
+
+
+def __getattr__(name):
+    if name == 'commandline_schema':
+        return schema.get_schema()[0]
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name)
+    )
 
 
-with WorkingDirectory(__file__):
-    commandline_schema = load('commandline.schema')
-GLOBAL_ENV = {}
+if sys.version_info < (3, 7):
+    # Modules have no __getattr__ (PEP 562) before Python 3.7
+    commandline_schema = schema.get_schema()[0]
 
 
 def callable(name=None):
-    def decorator(function):
-        GLOBAL_ENV[name or function.__name__] = function
-        return function
-    return decorator
+    return GLOBAL_ENV.callable(name)
+
+
+class PendingEdit(object):
+    def __init__(self, json_data, valid_base=False):
+        self.json_data = json_data
+        self.valid_base = valid_base
+        self.dirty = False
+        self.modules = set()
+
+    def validate(self):
+        for module in self.modules:
+            if module in self.json_data['modules']:
+                schema.check_module(self.json_data['modules'][module])
 
 
 class ParserDefinition(object):
@@ -99,30 +148,60 @@ class ParserDefinition(object):
             filepath = os.path.abspath(filepath)
         module = get_module(filepath)
         if not os.path.isfile(filepath):
+            import shutil
             argutil_path = os.path.abspath(__file__)
             argutil_dir = os.path.dirname(argutil_path)
             template_path = os.path.join(argutil_dir, defaults.TEMPLATE_FILE)
             shutil.copy2(template_path, filepath)
-        with WorkingDirectory(filepath):
-            definitions_file = os.path.abspath(definitions_file)
-            defaults_file = os.path.abspath(defaults_file)
-        if not os.path.isfile(definitions_file):
-            save({'modules': {}}, definitions_file)
-        json_data = validate(definitions_file)
-        if module in json_data['modules']:
-            if fail_if_exists:
-                raise KeyError('module already defined')
-        else:
-            json_data['modules'][module] = {'examples': [], 'args': []}
-        save(json_data, definitions_file)
+        definitions_file = resolve_path(filepath, definitions_file)
+        defaults_file = resolve_path(filepath, defaults_file)
+        sharded = shards.is_sharded(definitions_file)
+        with fileio.locked(definitions_file):
+            if sharded:
+                json_data = shards.read_file(definitions_file, module)[0]
+            else:
+                if not os.path.isfile(definitions_file):
+                    save({'modules': {}}, definitions_file)
+                json_data = validate(definitions_file)
+            if module in json_data['modules']:
+                if fail_if_exists:
+                    raise KeyError('module already defined')
+            else:
+                json_data['modules'][module] = {'examples': [], 'args': []}
+            if sharded:
+                schema.mark_valid(
+                    *shards.save(definitions_file, json_data, module),
+                    module=True
+                )
+            else:
+                schema.mark_valid(
+                    definitions_file,
+                    save(json_data, definitions_file)
+                )
         return ParserDefinition(filepath, definitions_file, defaults_file)
 
+    @staticmethod
+    def from_module(module, *args, **kwargs):
+        if isinstance(module, str):
+            module = sys.modules[module]
+        filepath = getattr(module, '__file__', None)
+        if filepath is None:
+            raise ValueError(
+                'module {} has no __file__'.format(module.__name__)
+            )
+        return ParserDefinition(filepath, *args, **kwargs)
+
     def __init__(
         self,
         filepath=None,
         definitions_file=defaults.DEFINITIONS_FILE,
         defaults_file=defaults.DEFAULTS_FILE,
         env=None,
+        cache=None,
+        cache_dir=None,
+        compiled_file=defaults.COMPILED_FILE,
+        stream=None,
+        plugins=None,
         **kwargs
     ):
         if filepath is None:
@@ -133,38 +212,167 @@ class ParserDefinition(object):
             filepath = os.path.abspath(filepath)
         self.filepath = filepath
         self.module = get_module(filepath)
-        with WorkingDirectory(filepath):
-            self.definitions_file = os.path.abspath(definitions_file)
-            self.defaults_file = os.path.abspath(defaults_file)
-        self.env = env or {}
+        self.definitions_file = resolve_path(filepath, definitions_file)
+        self.defaults_file = resolve_path(filepath, defaults_file)
+        self.compiled_file = resolve_path(
+            filepath,
+            compiled_file.format(module=self.module)
+        )
+        if isinstance(env, Registry):
+            self.env = env
+        else:
+            self.env = Registry(env)
+        self.cache = cache
+        self.cache_dir = cache_dir
+        self.stream = stream
+        self.plugins = plugins
+        self._local = threading.local()
 
     def callable(self, name=None):
-        def decorator(function):
-            self.env[name or function.__name__] = function
-            return function
-        return decorator
+        return self.env.callable(name)
+
+    def __get_cache_dir__(self):
+        if cache.enabled(self.cache):
+            return cache.get_cache_dir(self.definitions_file, self.cache_dir)
+        return None
+
+    def __get_transaction__(self):
+        return getattr(self._local, 'transaction', None)
+
+    def __load__(self, json_file):
+        transaction = self.__get_transaction__()
+        if transaction is None:
+            return load(json_file)
+        if json_file not in transaction:
+            if self.__is_sharded__(json_file):
+                transaction[json_file] = PendingEdit(*shards.read_file(
+                    json_file,
+                    self.module,
+                    self.__get_cache_dir__()
+                ))
+            elif (
+                json_file == self.definitions_file and
+                os.path.isfile(json_file)
+            ):
+                transaction[json_file] = PendingEdit(*schema.read_file(
+                    json_file,
+                    self.__get_cache_dir__()
+                ))
+            else:
+                transaction[json_file] = PendingEdit(load(json_file))
+        return transaction[json_file].json_data
+
+    def __save__(self, json_data, json_file, module=None):
+        transaction = self.__get_transaction__()
+        if json_file not in transaction:
+            transaction[json_file] = PendingEdit(json_data)
+        pending = transaction[json_file]
+        pending.json_data = json_data
+        pending.dirty = True
+        if module is not None:
+            pending.modules.add(module)
+
+    @contextmanager
+    def transaction(self):
+        if self.__get_transaction__() is not None:
+            yield self
+            return
+        with fileio.locked(self.definitions_file, self.defaults_file):
+            self._local.transaction = {}
+            try:
+                yield self
+                pending = [
+                    (json_file, edit)
+                    for json_file, edit in self._local.transaction.items()
+                    if edit.dirty
+                ]
+                for json_file, edit in pending:
+                    edit.validate()
+            finally:
+                self._local.transaction = None
+            for json_file, edit in pending:
+                self.__write__(json_file, edit)
+
+    def __is_sharded__(self, json_file):
+        return (
+            json_file == self.definitions_file and
+            shards.is_sharded(json_file)
+        )
+
+    def __write__(self, json_file, edit):
+        sharded = self.__is_sharded__(json_file)
+        if sharded:
+            json_file, text = shards.save(
+                json_file,
+                edit.json_data,
+                self.module
+            )
+        else:
+            text = save(edit.json_data, json_file)
+        if edit.valid_base and text is not None:
+            schema.mark_valid(
+                json_file,
+                text,
+                self.__get_cache_dir__(),
+                module=sharded
+            )
+
+    def __get_sources__(self):
+        if shards.is_sharded(self.definitions_file):
+            sources = shards.get_sources(self.definitions_file, self.module)
+        else:
+            sources = [self.definitions_file]
+        sources.append(self.defaults_file)
+        if plugins.enabled(self.plugins):
+            sources += plugins.get_sources()
+        return sources
+
+    def __get_plugins_key__(self):
+        if plugins.enabled(self.plugins):
+            return plugins.get_key()
+        return None
+
+    def validate(self):
+        if shards.is_sharded(self.definitions_file):
+            with fileio.locked(self.definitions_file):
+                shards.validate(
+                    self.definitions_file,
+                    self.__get_cache_dir__()
+                )
+            return
+        with fileio.locked(self.definitions_file):
+            with open(self.definitions_file, 'rb') as f:
+                data = f.read()
+            schema.check(backend.loads(data))
+            schema.mark_valid(
+                self.definitions_file,
+                data,
+                self.__get_cache_dir__()
+            )
 
     def delete(self):
-        json_data = load(self.definitions_file)
-        del json_data['modules'][self.module]
-        save(json_data, self.definitions_file)
-        json_data = load(self.defaults_file)
-        if self.module in json_data:
-            del json_data[self.module]
-            save(json_data, self.defaults_file)
+        with self.transaction():
+            json_data = self.__load__(self.definitions_file)
+            del json_data['modules'][self.module]
+            self.__save__(json_data, self.definitions_file)
+            json_data = self.__load__(self.defaults_file)
+            if self.module in json_data:
+                del json_data[self.module]
+                self.__save__(json_data, self.defaults_file)
 
     def add_example(
         self,
         usage,
         description='',
     ):
-        json_data = load(self.definitions_file)
         example = {
             'usage': usage,
             'description': description
         }
-        json_data['modules'][self.module]['examples'].append(example)
-        save(validate(json_data), self.definitions_file)
+        with self.transaction():
+            json_data = self.__load__(self.definitions_file)
+            json_data['modules'][self.module]['examples'].append(example)
+            self.__save__(json_data, self.definitions_file, self.module)
 
     def add_argument(
         self,
@@ -172,7 +380,6 @@ class ParserDefinition(object):
         short=None,
         **kwargs
     ):
-        json_data = load(self.definitions_file)
         arg = {}
         if short is not None:
             arg['short'] = short
@@ -200,35 +407,46 @@ class ParserDefinition(object):
                 raise TypeError(help_err_msg)
         arg['help'] = help
 
-        json_data['modules'][self.module]['args'].append(arg)
-        save(validate(json_data), self.definitions_file)
+        with self.transaction():
+            json_data = self.__load__(self.definitions_file)
+            json_data['modules'][self.module]['args'].append(arg)
+            self.__save__(json_data, self.definitions_file, self.module)
 
     def set_defaults(self, **kwargs):
-        json_data = load(self.defaults_file)
-        if self.module not in json_data:
-            json_data[self.module] = {}
-        module = json_data[self.module]
-        for k, v in kwargs.items():
-            m = module
-            while k not in m and '.' in k:
-                index = k.index('.')
-                k_parent = k[:index]
-                if k_parent not in m:
-                    m[k_parent] = {}
-                m = m[k_parent]
-                k = k[index + 1:]
-            m[k] = v
-        save(json_data, self.defaults_file)
+        with self.transaction():
+            json_data = self.__load__(self.defaults_file)
+            if self.module not in json_data:
+                json_data[self.module] = {}
+            module = json_data[self.module]
+            for k, v in kwargs.items():
+                m = module
+                while k not in m and '.' in k:
+                    index = k.index('.')
+                    k_parent = k[:index]
+                    if k_parent not in m:
+                        m[k_parent] = {}
+                    m = m[k_parent]
+                    k = k[index + 1:]
+                m[k] = v
+            self.__save__(json_data, self.defaults_file)
 
     def get_defaults(self):
-        json_data = load(self.defaults_file)
+        json_data = self.__load__(self.defaults_file)
         return json_data.get(self.module, {})
 
     def config(self, configs=None):
         if configs:
+            try:
+                plan = self.get_coercion_plan()
+            except (IOError, OSError, KeyError):
+                # No definitions for this module; values are guessed below
+                plan = coercion.CoercionPlan({})
             module_defaults = {}
             for k, v in [__split_any__(kv, '=:') for kv in configs]:
-                if v[0] == '[' and v[-1] == ']':
+                coercer = plan.get(k)
+                if coercer is not None:
+                    v = coercer.parse(v)
+                elif v[0] == '[' and v[-1] == ']':
                     v = [__parse_value__(s) for s in v[1:-1].split(',')]
                 else:
                     v = __parse_value__(v)
@@ -248,47 +466,245 @@ class ParserDefinition(object):
                     configs.append('{}={}'.format(k, v))
             return configs
 
-    def get_parser(self, env=None):
-        if not os.path.isfile(self.definitions_file):
+    def compile(self, compiled_file=None):
+        compiled_file = os.path.abspath(compiled_file or self.compiled_file)
+        sources = self.__get_sources__()
+        stamps = [cache.stamp(source) for source in sources]
+        definition, module_defaults = self.__get_resolved__()
+        text = compiler.generate(
+            self.filepath,
+            self.module,
+            definition,
+            module_defaults,
+            stamps,
+            compiled_file,
+            self.__get_plugins_key__()
+        )
+        compiler.verify(text)
+        compiler.write(compiled_file, text)
+        return compiled_file
+
+    def completion(self, index_file=None):
+        from . import completion
+        if index_file is None:
+            index_file = resolve_path(
+                self.filepath,
+                defaults.COMPLETION_FILE.format(module=self.module)
+            )
+        index_file = os.path.abspath(index_file)
+        stamps = [cache.stamp(source) for source in self.__get_sources__()]
+        definition = self.__get_resolved__()[0]
+        completion.write(
+            index_file,
+            completion.build_index(self, definition, stamps)
+        )
+        return index_file
+
+    def get_parser(self, env=None, lazy=False):
+        with instrument.stage('get_parser', module=self.module, lazy=lazy):
+            parser = self.__get_parser__(env, lazy)
+        if instrument.active() is not None:
+            instrument.time_parser(parser)
+        return parser
+
+    def __get_parser__(self, env, lazy):
+        compiled = compiler.load(
+            self.compiled_file,
+            self.module,
+            self.__get_plugins_key__()
+        )
+        if compiled is not None:
+            instrument.count('compiled.hit')
+            try:
+                with instrument.stage('build', compiled=True):
+                    return compiled.build(self.__get_env__(env), lazy)
+            except Exception as e:
+                logger.warning('could not build from {}: {}'.format(
+                    self.compiled_file, e
+                ))
+
+        if not os.path.exists(self.definitions_file):
             logger.error(
                 'Argument definition file "{}" not found!'.format(
                     self.definitions_file
                 )
             )
             exit(1)
-        if env is None:
-            env = {}
 
-        json_data = validate(self.definitions_file)['modules']
-        if self.module not in json_data:
-            raise KeyError(
-                'No entry for {} in {}'.format(
-                    self.module,
-                    self.definitions_file
+        definition, module_defaults = self.__get_resolved__()
+
+        with instrument.stage('build'):
+            return __build_parser__(
+                self.module,
+                definition,
+                module_defaults=module_defaults,
+                env=self.__get_env__(env),
+                lazy=lazy
+            )
+
+    def parse_args(self, args=None, env=None, lazy=False, slots=False):
+        if args is None:
+            args = sys.argv[1:]
+        namespace = None
+        if daemon.enabled():
+            namespace = daemon.parse_args(
+                self,
+                args,
+                self.__get_env__(env),
+                lambda: self.get_parser(env, lazy)
+            )
+            if namespace is None:
+                instrument.count('daemon.fallback')
+            else:
+                instrument.count('daemon.hit')
+        if namespace is None:
+            namespace = self.get_parser(env, lazy).parse_args(args)
+        if slots:
+            namespace = self.get_result_types().convert(namespace)
+        return namespace
+
+    def parse_all(self, argvs, env=None, lazy=True, processes=None,
+                  chunksize=bulk.CHUNKSIZE, slots=False):
+        if isinstance(argvs, str):
+            argvs = bulk.read_manifest(argvs)
+        return bulk.parse_all(
+            self, argvs, env, lazy, processes, chunksize, slots
+        )
+
+    def get_coercion_plan(self, definition=None):
+        if definition is None:
+            definition = self.__get_resolved__()[0]
+        memo = getattr(self, '_coercion_plan', None)
+        if memo is None or memo[0] is not definition:
+            memo = (definition, coercion.CoercionPlan(definition))
+            self._coercion_plan = memo
+        return memo[1]
+
+    def __coerce_defaults__(self, definition, module_defaults):
+        memo = getattr(self, '_coerced_defaults', None)
+        if (
+            memo is None or
+            memo[0] is not definition or
+            memo[1] != module_defaults
+        ):
+            with instrument.stage('coerce_defaults'):
+                memo = (
+                    definition,
+                    module_defaults,
+                    self.get_coercion_plan(definition).coerce_defaults(
+                        module_defaults
+                    )
                 )
+            self._coerced_defaults = memo
+        return memo[2]
+
+    def get_result_types(self):
+        definition, module_defaults = self.__get_resolved__()
+        memo = getattr(self, '_result_types', None)
+        if memo is None or memo[0] is not definition:
+            memo = (definition, results.ResultTypes(
+                self.module,
+                definition,
+                module_defaults
+            ))
+            self._result_types = memo
+        return memo[1]
+
+    def __get_env__(self, env):
+        maps = get_maps(self.env) + get_maps(GLOBAL_ENV) + get_maps(env)
+        if env is None or isinstance(env, Registry):
+            return Environment.shared(*maps)
+        return Environment(*maps)
+
+    def __resolve__(self, cache_dir):
+        if shards.is_sharded(self.definitions_file):
+            definition, fingerprint = shards.read_module(
+                self.definitions_file,
+                self.module,
+                cache_dir
+            )
+            modules = {} if definition is None else {self.module: definition}
+            memo_key = (self.definitions_file, self.module)
+        elif stream.should_stream(self.definitions_file, self.stream):
+            definition, fingerprint = stream.read_module(
+                self.definitions_file,
+                self.module,
+                cache_dir
+            )
+            modules = {} if definition is None else {self.module: definition}
+            memo_key = (self.definitions_file, self.module)
+        else:
+            json_data, fingerprint = schema.read_validated(
+                self.definitions_file,
+                cache_dir
             )
-        json_data = json_data[self.module]
+            modules = json_data['modules']
+            memo_key = self.definitions_file
+        with _resolved_lock:
+            memo = RESOLVED_DEFINITIONS.get(memo_key)
+            if memo is None or memo[0] != fingerprint:
+                memo = (fingerprint, {})
+                RESOLVED_DEFINITIONS[memo_key] = memo
+        resolved = memo[1]
+        if self.module not in resolved:
+            if self.module not in modules:
+                raise KeyError(
+                    'No entry for {} in {}'.format(
+                        self.module,
+                        self.definitions_file
+                    )
+                )
+            instrument.count('resolve.miss')
+            with instrument.stage('resolve', module=self.module):
+                resolved[self.module] = resolve_definition(
+                    modules[self.module]
+                )
+        else:
+            instrument.count('resolve.hit')
+        return resolved[self.module]
+
+    def __get_resolved__(self):
+        sources = self.__get_sources__()
+        cache_dir = self.__get_cache_dir__()
+        use_cache = cache_dir is not None
+        if use_cache:
+            entry_path = cache.get_entry_path(self.module, sources, cache_dir)
+            with instrument.stage('cache.read'):
+                entry = cache.read_entry(entry_path)
+            if entry is not None:
+                instrument.count('cache.hit')
+                return entry['definition'], entry['defaults']
+            instrument.count('cache.miss')
+            stamps = [cache.stamp(source) for source in sources]
+
+        definition = self.__resolve__(cache_dir)
+        if plugins.enabled(self.plugins):
+            with instrument.stage('plugins'):
+                definition = plugins.merge(
+                    definition,
+                    self.module,
+                    plugins.get_index()
+                )
 
-        if os.path.isfile(self.defaults_file):
-            module_defaults = load(self.defaults_file)
-            if self.module in module_defaults:
-                module_defaults = module_defaults[self.module]
+        with instrument.stage('load', file=self.defaults_file):
+            if os.path.isfile(self.defaults_file):
+                module_defaults = load(self.defaults_file)
+                if self.module in module_defaults:
+                    module_defaults = module_defaults[self.module]
+                else:
+                    module_defaults = {}
             else:
                 module_defaults = {}
-        else:
-            module_defaults = {}
-        env = dict(env)
-        for k, v in GLOBAL_ENV.items():
-            env[k] = v
-        for k, v in self.env.items():
-            env[k] = v
+        module_defaults = self.__coerce_defaults__(definition, module_defaults)
 
-        return __build_parser__(
-            self.module,
-            json_data,
-            module_defaults=module_defaults,
-            env=env
-        )
+        if use_cache:
+            with instrument.stage('cache.write'):
+                cache.write_entry(entry_path, {
+                    'sources': stamps,
+                    'definition': definition,
+                    'defaults': module_defaults,
+                })
+        return definition, module_defaults
 
 
 def __split_any__(text, delimiters):
@@ -319,121 +735,112 @@ def __parse_value__(value):
 
 
 def __add_argument_to_parser__(parser, param, env):
-    param = dict(param)
+    kwargs = {
+        k: v for k, v in param.items()
+        if k not in ['long', 'short', 'help', 'type']
+    }
     if 'help' in param:
         if param['help'] is None:
-            param['help'] = SUPPRESS
+            kwargs['help'] = SUPPRESS
         else:
-            param['help'] = '\n'.join(
-                h.format(**env) for h in param['help']
-            )
+            kwargs['help'] = env.format('\n'.join(param['help']))
     if 'type' in param:
         func = param['type']
         try:
-            param['type'] = env[func]
+            kwargs['type'] = env[func]
         except KeyError:
             try:
-                param['type'] = primitives[func]
+                kwargs['type'] = primitives[func]
             except KeyError:
-                param['type'] = globals()[func]
-    long_form = param['long']
-    del param['long']
+                kwargs['type'] = globals()[func]
     if 'short' in param:
-        short_form = param['short']
-        del param['short']
-        parser.add_argument(short_form, long_form, **param)
+        parser.add_argument(param['short'], param['long'], **kwargs)
     else:
-        parser.add_argument(long_form, **param)
-
+        parser.add_argument(param['long'], **kwargs)
 
-def __add_example_to_parser__(parserArgs, example):
-    if 'epilog' not in parserArgs:
-        parserArgs['epilog'] = 'examples:'
-    parserArgs['epilog'] += '\n    {usage:<44}{description}'.format(**example)
 
+def __format_example__(example):
+    return '    {usage:<44}{description}'.format(**example)
 
-def __build_parser__(name, definition, module_defaults, env,
-                     subparsers=None, templates=None, parents=None):
-    if templates is None:
-        templates = {}
-    if parents is None:
-        parents = []
 
+def __get_parser_args__(name, definition):
     parserArgs = dict(prog=name, formatter_class=RawWithDefaultsFormatter)
+    examples = definition.get('examples', [])
+    if examples:
+        parserArgs['epilog'] = '\n'.join(
+            ['examples:'] + [__format_example__(e) for e in examples]
+        )
+    return parserArgs
 
-    if 'template' in definition:
-        template_name = definition['template']
-        if template_name not in templates:
-            raise KeyError('unknown template ' + template_name)
-        template = templates[template_name]
-        if 'examples' in template:
-            for example in template['examples']:
-                __add_example_to_parser__(parserArgs, example)
-    else:
-        template = None
-
-    if 'examples' in definition and definition['examples']:
-        for example in definition['examples']:
-            __add_example_to_parser__(parserArgs, example)
 
+def __build_parser__(name, definition, module_defaults, env,
+                     subparsers=None, lazy=False):
+    valid_kwargs = ['help', 'aliases']
     if subparsers is None:
-        parser = ArgumentParser(**parserArgs)
+        parser = ArgumentParser(**__get_parser_args__(name, definition))
+    elif lazy:
+        def factory():
+            parser = subparsers._parser_class(
+                **__get_parser_args__(name, definition)
+            )
+            return __populate_parser__(
+                parser, name, definition, module_defaults, env, True, lazy
+            )
+        instrument.count('build.deferred')
+        subparsers.add_lazy_parser(
+            name,
+            factory,
+            **{k: definition[k] for k in valid_kwargs if k in definition}
+        )
+        return None
     else:
-        valid_kwargs = ['help', 'aliases']
+        parserArgs = __get_parser_args__(name, definition)
         for k in valid_kwargs:
             if k in definition:
                 parserArgs[k] = definition[k]
         parser = subparsers.add_parser(name, **parserArgs)
+    return __populate_parser__(
+        parser,
+        name,
+        definition,
+        module_defaults,
+        env,
+        subparsers is not None,
+        lazy
+    )
+
+
+def __populate_parser__(parser, name, definition, module_defaults, env,
+                        is_subparser, lazy):
+    if is_subparser:
         if name in env:
             parser.set_defaults(func=env[name])
+        elif 'handler' in definition:
+            parser.set_defaults(
+                func=handlers.LazyHandler(definition['handler'])
+            )
         else:
             def usage(*args, **kwargs):
                 parser.print_help()
                 return 0
             parser.set_defaults(func=usage)
-    if 'args' in definition:
-        for param in definition['args']:
-            __add_argument_to_parser__(parser, param, env)
-
-    if template:
-        if 'args' in template:
-            for param in template['args']:
-                __add_argument_to_parser__(parser, param, env)
-
-    # Apply default values
-    for k, v in module_defaults.items():
-        try:
-            module_defaults[k] = v.format(**env)
-        except AttributeError:
-            continue
-    parser.set_defaults(**module_defaults)
-
-    if 'templates' in definition:
-        templates = dict(templates)
-        for k, v in definition['templates'].items():
-            if 'parent' in v:
-                parent_name = v['parent']
-                if parent_name not in definition['templates']:
-                    raise KeyError('unknown parent template ' + parent_name)
-                new_v = deepcopy(definition['templates'][parent_name])
-                for k2, v2 in v.items():
-                    if k2 not in new_v:
-                        new_v[k2] = []
-                    new_v2 = deepcopy(new_v[k2])
-                    if k2 == 'args':
-                        new_v2 = list(
-                            {
-                                v['long']: v for v in deepcopy(new_v2 + v2)
-                            }.values()
-                        )
-                    else:
-                        new_v2 += deepcopy(v2)
-                    new_v[k2] = new_v2
-                templates[k] = new_v
-            else:
-                templates[k] = v
+    args = definition.get('args', [])
+    instrument.count('build.parsers')
+    instrument.count('build.arguments', len(args))
+    for param in args:
+        __add_argument_to_parser__(parser, param, env)
+
+    # Apply default values; they were coerced when resolved (and may be
+    # shared between builds), so only templates are formatted per build
+    with instrument.stage('apply_defaults', module=name):
+        parser.set_defaults(**{
+            k: env.format(v) if coercion.is_template(v) else v
+            for k, v in module_defaults.items()
+        })
 
     if 'modules' in definition:
+        if lazy:
+            parser.register('action', 'parsers', LazySubParsersAction)
         subparsers = parser.add_subparsers(dest='command')
         for submodule_name, submodule in definition['modules'].items():
             if submodule_name in module_defaults:
@@ -446,8 +853,7 @@ def __build_parser__(name, definition, module_defaults, env,
                 sub_defaults,
                 env,
                 subparsers,
-                templates,
-                parents + [name]
+                lazy
             )
 
     return parser
@@ -463,11 +869,38 @@ def get_parser(
     env=None,
     definitions_file=defaults.DEFINITIONS_FILE,
     defaults_file=defaults.DEFAULTS_FILE,
+    cache=None,
+    lazy=False,
+    stream=None,
+    plugins=None,
+    **kwargs
+):
+    return ParserDefinition(
+        filepath,
+        definitions_file,
+        defaults_file,
+        cache=cache,
+        stream=stream,
+        plugins=plugins,
+        __stackdepth__=kwargs.get('__stackdepth__', 1) + 1
+    ).get_parser(env, lazy)
+
+
+def parse_args(
+    filepath=None,
+    args=None,
+    env=None,
+    definitions_file=defaults.DEFINITIONS_FILE,
+    defaults_file=defaults.DEFAULTS_FILE,
+    lazy=False,
+    plugins=None,
+    slots=False,
     **kwargs
 ):
     return ParserDefinition(
         filepath,
         definitions_file,
         defaults_file,
+        plugins=plugins,
         __stackdepth__=kwargs.get('__stackdepth__', 1) + 1
-    ).get_parser(env)
+    ).parse_args(args, env, lazy, slots)
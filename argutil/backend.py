@@ -0,0 +1,61 @@
+##
+#  @package argutil.backend
+#  Optional faster JSON decoders, used when installed
+
+import json
+import os
+
+BACKEND_ENV_VAR = 'ARGUTIL_JSON_BACKEND'
+BACKENDS = ['orjson', 'ujson', 'json']
+
+_loads = None
+
+
+def __orjson__():
+    import orjson
+    return orjson.loads
+
+
+def __ujson__():
+    import ujson
+
+    def loads(data):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return ujson.loads(data)
+    return loads
+
+
+def __json__():
+    def loads(data):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return json.loads(data)
+    return loads
+
+
+FACTORIES = {
+    'orjson': __orjson__,
+    'ujson': __ujson__,
+    'json': __json__,
+}
+
+
+def get_loads(name=None):
+    name = name or os.environ.get(BACKEND_ENV_VAR)
+    if name:
+        if name not in FACTORIES:
+            raise ValueError('unknown JSON backend ' + name)
+        return FACTORIES[name]()
+    for name in BACKENDS:
+        try:
+            return FACTORIES[name]()
+        except ImportError:
+            continue
+
+
+def loads(data):
+    global _loads
+    if _loads is None:
+        _loads = get_loads()
+    return _loads(data)
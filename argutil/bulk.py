@@ -0,0 +1,225 @@
+##
+#  @package argutil.bulk
+#  Parsing many argv vectors with one parser, without exiting on errors
+
+import functools
+import itertools
+import json
+import shlex
+import threading
+from argparse import _SubParsersAction
+from .handlers import LazyHandler
+from .lazy import LazyParser
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+CHUNKSIZE = 64
+
+# Set in pool workers; inherited from the parent when the pool forks
+_worker = None
+
+_local = threading.local()
+_classes = {}
+_lock = threading.Lock()
+
+
+class ArgvError(object):
+    def __init__(self, index, argv, status, message):
+        self.index = index
+        self.argv = argv
+        self.status = status
+        self.message = message
+
+    def __eq__(self, other):
+        return isinstance(other, ArgvError) and vars(self) == vars(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'ArgvError(index={!r}, argv={!r}, status={!r}, ' \
+            'message={!r})'.format(
+                self.index, self.argv, self.status, self.message
+            )
+
+
+def get_argv(item):
+    if isinstance(item, (list, tuple)):
+        return list(item)
+    return shlex.split(item)
+
+
+def read_manifest(filepath):
+    with open(filepath, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('['):
+                yield json.loads(line)
+            else:
+                yield shlex.split(line)
+
+
+# Output capture. Parsers used for bulk parsing write usage, help and error
+# messages to the calling thread's buffer instead of sys.stdout/sys.stderr,
+# so other threads' output is left alone
+
+class CapturingParser(object):
+    def _print_message(self, message, file=None):
+        output = getattr(_local, 'output', None)
+        if output is None:
+            return super(CapturingParser, self)._print_message(message, file)
+        if message:
+            output.write(message)
+
+
+def get_capturing_class(cls):
+    if issubclass(cls, CapturingParser):
+        return cls
+    with _lock:
+        if cls not in _classes:
+            _classes[cls] = type(cls.__name__, (CapturingParser, cls), {})
+        return _classes[cls]
+
+
+def capturing(parser, seen=None):
+    seen = set() if seen is None else seen
+    if id(parser) in seen:
+        return parser
+    seen.add(id(parser))
+    parser.__class__ = get_capturing_class(type(parser))
+    for action in parser._actions:
+        if not isinstance(action, _SubParsersAction):
+            continue
+        # Lazy subparsers are created with this class when selected
+        action._parser_class = get_capturing_class(action._parser_class)
+        for subparser in dict.values(action._name_parser_map):
+            if not isinstance(subparser, LazyParser):
+                capturing(subparser, seen)
+    return parser
+
+
+def parse_one(parser, index, item, convert=None):
+    try:
+        argv = get_argv(item)
+    except ValueError as e:
+        return ArgvError(index, item, None, str(e))
+    _local.output = output = StringIO()
+    try:
+        namespace = parser.parse_args(argv)
+    except SystemExit as e:
+        return ArgvError(index, argv, e.code, output.getvalue())
+    except Exception as e:
+        return ArgvError(index, argv, None, '{}: {}'.format(
+            type(e).__name__, e
+        ))
+    finally:
+        _local.output = None
+    if convert is not None:
+        return convert(namespace)
+    return namespace
+
+
+def get_convert(parser_def, slots):
+    if slots:
+        return parser_def.get_result_types().convert
+    return None
+
+
+def parse_serial(parser, argvs, convert=None):
+    for index, item in enumerate(argvs):
+        yield parse_one(parser, index, item, convert)
+
+
+# Process pool
+
+def __init_worker__(parser_def, env, lazy, slots):
+    global _worker
+    _worker = (
+        capturing(parser_def.get_parser(env, lazy)),
+        parser_def.__get_env__(env),
+        get_convert(parser_def, slots),
+    )
+
+
+def __parse_in_worker__(task):
+    parser, env, convert = _worker
+    result = parse_one(parser, task[0], task[1], convert)
+    if isinstance(result, ArgvError):
+        return result, None
+    # Env callables do not survive pickling; send the env name instead.
+    # Lazy handlers pickle as their "module:function" spec.
+    func = getattr(result, 'func', None)
+    if func is None or isinstance(func, LazyHandler):
+        return result, None
+    del result.func
+    for name in env:
+        if env[name] is func:
+            return result, name
+    return result, True
+
+
+def __get_pool__(processes, parser_def, env, lazy, slots):
+    import multiprocessing
+    try:
+        context = multiprocessing.get_context('fork')
+    except (AttributeError, ValueError):
+        return None
+    return context.Pool(
+        processes,
+        initializer=__init_worker__,
+        initargs=(parser_def, env, lazy, slots)
+    )
+
+
+def parse_pool(pool, parser_def, argvs, env, lazy, chunksize):
+    from multiprocessing.pool import MaybeEncodingError
+    merged_env = parser_def.__get_env__(env)
+    # Bound how much of the input is read ahead of the results
+    batch_size = chunksize * pool._processes * 4
+    tasks = enumerate(argvs)
+    while True:
+        batch = list(itertools.islice(tasks, batch_size))
+        if not batch:
+            return
+        results = pool.imap(__parse_in_worker__, batch, chunksize)
+        for index, item in batch:
+            try:
+                result, func = next(results)
+            except MaybeEncodingError as e:
+                yield ArgvError(index, item, None, str(e))
+                continue
+            if func is True:
+                def usage(*args, **kwargs):
+                    argv = get_argv(kwargs.pop('_item'))
+                    parser = parser_def.get_parser(env, lazy)
+                    return parser.parse_args(argv).func(*args, **kwargs)
+                result.func = functools.partial(usage, _item=item)
+            elif func is not None:
+                result.func = merged_env[func]
+            yield result
+
+
+def parse_all(parser_def, argvs, env=None, lazy=True, processes=None,
+              chunksize=CHUNKSIZE, slots=False):
+    if processes is not None and processes != 1:
+        pool = __get_pool__(processes, parser_def, env, lazy, slots)
+        if pool is not None:
+            try:
+                for result in parse_pool(
+                    pool, parser_def, argvs, env, lazy, chunksize
+                ):
+                    yield result
+            finally:
+                pool.terminate()
+                pool.join()
+            return
+    parser = capturing(parser_def.get_parser(env, lazy))
+    for result in parse_serial(
+        parser, argvs, get_convert(parser_def, slots)
+    ):
+        yield result
@@ -0,0 +1,111 @@
+##
+#  @package argutil.cache
+#  Opt-in on-disk cache of resolved parser definitions
+
+import logging
+import os
+import stat
+from . import defaults
+from . import fileio
+from . import snapshot
+
+logger = logging.getLogger('argutil')
+
+CACHE_VERSION = 3
+CACHE_ENV_VAR = 'ARGUTIL_CACHE'
+CACHE_DIR_ENV_VAR = 'ARGUTIL_CACHE_DIR'
+PYCACHE_DIR = '__pycache__'
+DIRECTORY = 'directory'
+
+
+def enabled(cache=None):
+    return defaults.get_flag(cache, CACHE_ENV_VAR)
+
+
+def xdg_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache'
+    )
+    return os.path.join(base, 'argutil')
+
+
+def get_cache_dir(definitions_file, cache_dir=None):
+    cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV_VAR)
+    if cache_dir:
+        return cache_dir
+    pycache = os.path.join(os.path.dirname(definitions_file), PYCACHE_DIR)
+    if os.path.isdir(pycache):
+        if os.access(pycache, os.W_OK):
+            return pycache
+    elif os.access(os.path.dirname(pycache), os.W_OK):
+        return pycache
+    return xdg_cache_dir()
+
+
+def get_entry_path(module, sources, cache_dir):
+    import hashlib
+    key = hashlib.sha1('\0'.join(sources).encode('utf-8')).hexdigest()
+    return os.path.join(
+        cache_dir,
+        'argutil-{}-{}.snapshot'.format(module, key[:16])
+    )
+
+
+def digest(data):
+    import hashlib
+    return hashlib.sha1(data).hexdigest()
+
+
+def stamp(filepath):
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return [filepath, None, None, None]
+    if stat.S_ISDIR(st.st_mode):
+        # Directories (see argutil.plugins) are only compared by mtime
+        return [filepath, st.st_mtime, None, DIRECTORY]
+    with open(filepath, 'rb') as f:
+        return [filepath, st.st_mtime, st.st_size, digest(f.read())]
+
+
+def is_fresh(source):
+    filepath, mtime, size, sha1 = source
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return sha1 is None
+    if sha1 is None:
+        return False
+    if sha1 == DIRECTORY or stat.S_ISDIR(st.st_mode):
+        return sha1 == DIRECTORY and st.st_mtime == mtime
+    if st.st_mtime == mtime and st.st_size == size:
+        return True
+    if st.st_size != size:
+        return False
+    with open(filepath, 'rb') as f:
+        return digest(f.read()) == sha1
+
+
+def read_entry(entry_path):
+    entry = snapshot.read(entry_path)
+    if not isinstance(entry, dict) or entry.get('version') != CACHE_VERSION:
+        return None
+    if not all(is_fresh(source) for source in entry['sources']):
+        return None
+    return entry
+
+
+def write_text(filepath, text):
+    dirname = os.path.dirname(filepath)
+    try:
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        fileio.write_atomic(filepath, text)
+    except (IOError, OSError) as e:
+        logger.debug('could not write cache file {}: {}'.format(
+            filepath, e
+        ))
+
+
+def write_entry(entry_path, entry):
+    write_text(entry_path, snapshot.dumps(dict(entry, version=CACHE_VERSION)))
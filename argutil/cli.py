@@ -0,0 +1,137 @@
+##
+#  @package argutil.cli
+#  The argutil command: compile parsers and generate shell completion
+
+from __future__ import print_function
+import argparse
+import os
+import sys
+
+
+def add_definition_args(parser):
+    parser.add_argument('--definitions-file')
+    parser.add_argument('--defaults-file')
+    parser.add_argument(
+        '--plugins',
+        action='store_true',
+        default=None,
+        help='include subcommands contributed by installed plugins'
+    )
+
+
+def get_parser_definition(opts, script):
+    from .argutil import ParserDefinition
+    kwargs = {
+        k: getattr(opts, k)
+        for k in ['definitions_file', 'defaults_file', 'plugins']
+        if getattr(opts, k) is not None
+    }
+    return ParserDefinition(script, **kwargs)
+
+
+def compile_command(parser, opts):
+    if opts.output and len(opts.script) > 1:
+        parser.error('--output requires a single script')
+    for script in opts.script:
+        try:
+            compiled_file = get_parser_definition(opts, script).compile(
+                opts.output
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        print(compiled_file)
+    return 0
+
+
+def completion_command(parser, opts):
+    from . import completion
+    parser_def = get_parser_definition(opts, opts.script)
+    index_file = parser_def.completion(opts.output)
+    prog = opts.prog or os.path.basename(opts.script)
+    print(completion.get_shim(
+        opts.shell,
+        prog,
+        completion.get_command(sys.executable, index_file)
+    ), end='')
+    return 0
+
+
+def complete_command(parser, opts):
+    from . import completion
+    index = completion.load(opts.index)
+    if index is None:
+        return 1
+    for candidate in completion.complete(index, opts.words):
+        print(candidate)
+    return 0
+
+
+def daemon_command(parser, opts):
+    from . import daemon
+    try:
+        daemon.serve(opts.socket)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog='argutil')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    compile_parser = subparsers.add_parser(
+        'compile',
+        help='compile a script\'s parser definition to a Python module'
+    )
+    compile_parser.add_argument('script', nargs='+')
+    compile_parser.add_argument('-o', '--output')
+    add_definition_args(compile_parser)
+    compile_parser.set_defaults(func=compile_command)
+
+    completion_parser = subparsers.add_parser(
+        'completion',
+        help='write a completion index and print a shell completion script'
+    )
+    completion_parser.add_argument('script')
+    completion_parser.add_argument(
+        '-s', '--shell',
+        choices=['bash', 'zsh'],
+        default='bash'
+    )
+    completion_parser.add_argument('-o', '--output')
+    completion_parser.add_argument(
+        '--prog',
+        help='command name to complete; defaults to the script file name'
+    )
+    add_definition_args(completion_parser)
+    completion_parser.set_defaults(func=completion_command)
+
+    complete_parser = subparsers.add_parser(
+        'complete',
+        help='print completions for the given words from a completion index'
+    )
+    complete_parser.add_argument('index')
+    complete_parser.add_argument('words', nargs=argparse.REMAINDER)
+    complete_parser.set_defaults(func=complete_command)
+
+    daemon_parser = subparsers.add_parser(
+        'daemon',
+        help='serve parsers from a resident process over a Unix socket'
+    )
+    daemon_parser.add_argument(
+        '--socket',
+        help='socket path; defaults to $ARGUTIL_DAEMON or a per-user path'
+    )
+    daemon_parser.set_defaults(func=daemon_command)
+    return parser
+
+
+def main(argv=None):
+    parser = get_parser()
+    opts = parser.parse_args(argv)
+    return opts.func(parser, opts)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
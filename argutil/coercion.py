@@ -0,0 +1,180 @@
+##
+#  @package argutil.coercion
+#  Typed coercion of defaults and config values from argument declarations
+#
+#  A plan maps each module's argument dests to how a value for that dest is
+#  read from a string, following its 'type', 'nargs', 'action' and 'choices'.
+#  Defaults are coerced once when definitions are resolved; keys without a
+#  declared argument are left to the caller.
+
+import logging
+from .results import NO_DEST_ACTIONS, get_dest
+
+logger = logging.getLogger('argutil')
+
+try:
+    string_types = (str, unicode)
+except NameError:
+    string_types = (str,)
+
+TRUE = ['true', 'yes', 'on', '1']
+FALSE = ['false', 'no', 'off', '0']
+
+LIST_NARGS = ['*', '+']
+LIST_ACTIONS = ['append', 'extend']
+BOOL_ACTIONS = ['store_true', 'store_false']
+# Actions that take no value of their own; their defaults are not coerced
+NO_VALUE_ACTIONS = ['store_const', 'append_const']
+
+
+def is_template(value):
+    return isinstance(value, string_types) and ('{' in value or '}' in value)
+
+
+def unquote(text):
+    text = text.strip()
+    if len(text) > 1 and text[0] in '\'"' and text[-1] == text[0]:
+        return text[1:-1]
+    return text
+
+
+def parse_bool(text):
+    value = unquote(text).lower()
+    if value in TRUE:
+        return True
+    if value in FALSE:
+        return False
+    raise ValueError('not a boolean: {!r}'.format(text))
+
+
+PARSERS = {
+    'bool': parse_bool,
+    'int': lambda text: int(unquote(text)),
+    'float': lambda text: float(unquote(text)),
+    'complex': lambda text: complex(unquote(text)),
+    'str': unquote,
+    'unicode': unquote,
+}
+STRING_TYPES = ['str', 'unicode']
+
+
+def split_list(text):
+    text = text.strip()
+    if text[:1] == '[' and text[-1:] == ']':
+        text = text[1:-1]
+    if not text.strip():
+        return []
+    return text.split(',')
+
+
+def get_type_name(param):
+    action = param.get('action')
+    if action in BOOL_ACTIONS:
+        return 'bool'
+    if action == 'count':
+        return 'int'
+    return param.get('type', 'str')
+
+
+def is_list(param):
+    nargs = param.get('nargs')
+    if param.get('action') in LIST_ACTIONS or nargs in LIST_NARGS:
+        return True
+    try:
+        return int(nargs) > 1
+    except (TypeError, ValueError):
+        return False
+
+
+class Coercer(object):
+    def __init__(self, name, param):
+        self.name = name
+        self.type_name = get_type_name(param)
+        # Other types (env callables, 'list', ...) are applied by argparse
+        # to string defaults when parsing
+        self.parse_item = PARSERS.get(self.type_name)
+        self.is_list = is_list(param)
+        self.choices = param.get('choices')
+
+    def __check__(self, value):
+        if self.choices and str(value) not in self.choices:
+            raise ValueError(
+                'invalid choice for {}: {!r} (choose from {})'.format(
+                    self.name,
+                    value,
+                    ', '.join(repr(c) for c in self.choices)
+                )
+            )
+        return value
+
+    def __parse_item__(self, text):
+        if self.parse_item is None:
+            return self.__check__(text)
+        try:
+            value = self.parse_item(text)
+        except ValueError:
+            raise ValueError('invalid {} value for {}: {!r}'.format(
+                self.type_name,
+                self.name,
+                text
+            ))
+        return self.__check__(value)
+
+    def parse(self, text):
+        if self.is_list:
+            return [self.__parse_item__(item) for item in split_list(text)]
+        return self.__parse_item__(text)
+
+    def __coerce_item__(self, value):
+        if not isinstance(value, string_types) or is_template(value):
+            return value
+        if self.type_name in STRING_TYPES:
+            return self.__check__(value)
+        return self.__parse_item__(value)
+
+    def coerce(self, value):
+        # Like argparse, a string default is converted as a single value,
+        # even for arguments that take a list
+        if self.is_list and isinstance(value, list):
+            return [self.__coerce_item__(item) for item in value]
+        return self.__coerce_item__(value)
+
+
+class CoercionPlan(object):
+    def __init__(self, definition, path=()):
+        self.path = path
+        self.fields = {}
+        for param in definition.get('args', []):
+            action = param.get('action')
+            if action in NO_DEST_ACTIONS or action in NO_VALUE_ACTIONS:
+                continue
+            dest = get_dest(param)
+            self.fields[dest] = Coercer('.'.join(path + (dest,)), param)
+        self.modules = {
+            name: CoercionPlan(submodule, path + (name,))
+            for name, submodule in definition.get('modules', {}).items()
+        }
+
+    def get(self, key):
+        plan = self
+        names = key.split('.')
+        for name in names[:-1]:
+            plan = plan.modules.get(name)
+            if plan is None:
+                return None
+        return plan.fields.get(names[-1])
+
+    def coerce_defaults(self, module_defaults):
+        coerced = {}
+        for k, v in module_defaults.items():
+            if isinstance(v, dict) and k in self.modules:
+                coerced[k] = self.modules[k].coerce_defaults(v)
+            elif k in self.fields:
+                try:
+                    coerced[k] = self.fields[k].coerce(v)
+                except ValueError as e:
+                    logger.warning('default left as is: {}'.format(e))
+                    coerced[k] = v
+            else:
+                coerced[k] = v
+        return coerced
@@ -0,0 +1,324 @@
+##
+#  @package argutil.compiler
+#  Ahead-of-time compilation of parser definitions to Python modules
+
+import math
+import os
+import threading
+from . import cache
+from . import coercion
+from . import fileio
+from . import handlers
+from .lazy import LazySubParsersAction
+from .primitives import primitives
+
+COMPILER_VERSION = 4
+
+HEADER = '''\
+# Generated by argutil from {definitions_file}. Do not edit.
+# Regenerate with: argutil compile {script}
+from argparse import ArgumentParser, SUPPRESS
+from argutil import compiler
+from argutil.argutil import RawWithDefaultsFormatter
+
+VERSION = {version!r}
+MODULE = {module!r}
+PLUGINS = {plugins!r}
+SOURCES = {sources!r}
+
+
+def build(env, lazy=False):
+    parser = ArgumentParser({parser_args})
+    return populate_0(parser, env, lazy)
+'''
+
+# Only files starting with this line are imported or overwritten
+GENERATED_MARKER = b'# Generated by argutil'
+
+COMPILED = {}
+_compiled_lock = threading.Lock()
+
+
+# Helpers called by generated modules
+
+def get_type(env, name):
+    try:
+        return env[name]
+    except KeyError:
+        try:
+            return primitives[name]
+        except KeyError:
+            from . import argutil
+            return getattr(argutil, name)
+
+
+def set_func(parser, env, name, handler=None):
+    if name in env:
+        parser.set_defaults(func=env[name])
+    elif handler is not None:
+        parser.set_defaults(func=handlers.LazyHandler(handler))
+    else:
+        def usage(*args, **kwargs):
+            parser.print_help()
+            return 0
+        parser.set_defaults(func=usage)
+
+
+def format_defaults(env, module_defaults):
+    for k, v in module_defaults.items():
+        if coercion.is_template(v):
+            module_defaults[k] = env.format(v)
+    return module_defaults
+
+
+def add_subparsers(parser, lazy):
+    if lazy:
+        parser.register('action', 'parsers', LazySubParsersAction)
+    return parser.add_subparsers(dest='command')
+
+
+def add_parser(subparsers, name, populate, env, lazy, parser_args, kwargs):
+    if lazy:
+        def factory():
+            return populate(
+                subparsers._parser_class(**parser_args), env, lazy
+            )
+        subparsers.add_lazy_parser(name, factory, **kwargs)
+    else:
+        parser_args = dict(parser_args, **kwargs)
+        populate(subparsers.add_parser(name, **parser_args), env, lazy)
+
+
+# Code generation
+
+def format_value(value):
+    # repr() of inf and nan is not a Python literal
+    if isinstance(value, float) and (math.isinf(value) or math.isnan(value)):
+        return 'float({!r})'.format(repr(value))
+    if isinstance(value, dict):
+        return '{{{}}}'.format(', '.join(
+            '{}: {}'.format(format_value(k), format_value(v))
+            for k, v in value.items()
+        ))
+    if isinstance(value, list):
+        return '[{}]'.format(', '.join(format_value(v) for v in value))
+    if isinstance(value, tuple):
+        return '({}{})'.format(
+            ', '.join(format_value(v) for v in value),
+            ',' if len(value) == 1 else ''
+        )
+    return repr(value)
+
+
+def format_call_args(*args, **kwargs):
+    parts = [repr(arg) for arg in args]
+    parts += ['{}={}'.format(k, v) for k, v in sorted(kwargs.items())]
+    return ', '.join(parts)
+
+
+def format_parser_args(name, definition):
+    from .argutil import __get_parser_args__
+    parser_args = __get_parser_args__(name, definition)
+    del parser_args['formatter_class']
+    kwargs = {k: format_value(v) for k, v in parser_args.items()}
+    kwargs['formatter_class'] = 'RawWithDefaultsFormatter'
+    return format_call_args(**kwargs)
+
+
+def format_help(lines):
+    if lines is None:
+        return 'SUPPRESS'
+    text = '\n'.join(lines)
+    if '{' in text or '}' in text:
+        return 'env.format({!r})'.format(text)
+    return repr(text)
+
+
+def format_argument(param):
+    param = dict(param)
+    kwargs = {}
+    if 'help' in param:
+        kwargs['help'] = format_help(param.pop('help'))
+    if 'type' in param:
+        kwargs['type'] = 'compiler.get_type(env, {!r})'.format(
+            param.pop('type')
+        )
+    flags = [param.pop('long')]
+    if 'short' in param:
+        flags.insert(0, param.pop('short'))
+    for k, v in param.items():
+        kwargs[k] = format_value(v)
+    return '    parser.add_argument({})'.format(
+        format_call_args(*flags, **kwargs)
+    )
+
+
+def generate_populate(functions, name, definition, module_defaults,
+                      is_subparser):
+    index = len(functions)
+    lines = ['def populate_{}(parser, env, lazy):'.format(index)]
+    functions.append(lines)
+    if is_subparser:
+        lines.append('    compiler.set_func(parser, env, {})'.format(
+            format_call_args(name, *[
+                definition[k] for k in ['handler'] if k in definition
+            ])
+        ))
+    for param in definition.get('args', []):
+        lines.append(format_argument(param))
+    if module_defaults:
+        lines.append(
+            '    parser.set_defaults(**compiler.format_defaults(env, '
+            '{}))'.format(format_value(module_defaults))
+        )
+    if 'modules' in definition:
+        lines.append('    subparsers = compiler.add_subparsers(parser, lazy)')
+        for submodule_name, submodule in definition['modules'].items():
+            sub_index = generate_populate(
+                functions,
+                submodule_name,
+                submodule,
+                module_defaults.get(submodule_name, {}),
+                True
+            )
+            kwargs = {
+                k: submodule[k] for k in ['help', 'aliases'] if k in submodule
+            }
+            lines.append(
+                '    compiler.add_parser(subparsers, {!r}, populate_{}, '
+                'env, lazy, dict({}), {})'.format(
+                    submodule_name,
+                    sub_index,
+                    format_parser_args(submodule_name, submodule),
+                    format_value(kwargs)
+                )
+            )
+    lines.append('    return parser')
+    return index
+
+
+def relative_sources(sources, compiled_file):
+    dirname = os.path.dirname(compiled_file)
+    return [
+        [os.path.relpath(source[0], dirname)] + list(source[1:])
+        for source in sources
+    ]
+
+
+def generate(filepath, module, definition, module_defaults, sources,
+             compiled_file, plugins=None):
+    functions = []
+    generate_populate(functions, module, definition, module_defaults, False)
+    header = HEADER.format(
+        definitions_file=os.path.basename(sources[0][0]),
+        script=os.path.basename(filepath),
+        version=COMPILER_VERSION,
+        module=module,
+        plugins=plugins,
+        sources=relative_sources(sources, compiled_file),
+        parser_args=format_parser_args(module, definition),
+    )
+    return '\n\n'.join(
+        [header] + ['\n'.join(lines) + '\n' for lines in functions]
+    )
+
+
+class VerifyEnv(object):
+    # Stands in for the script's env, which may not be registered yet
+
+    def __contains__(self, name):
+        return False
+
+    def __getitem__(self, name):
+        return str
+
+    def format(self, text):
+        return text
+
+
+def verify(text):
+    namespace = {}
+    try:
+        exec(compile(text, '<generated parser>', 'exec'), namespace)
+        namespace['build'](VerifyEnv())
+    except Exception as e:
+        raise ValueError('generated parser does not build: {}: {}'.format(
+            type(e).__name__, e
+        ))
+
+
+def is_generated(compiled_file):
+    try:
+        with open(compiled_file, 'rb') as f:
+            return f.read(len(GENERATED_MARKER)) == GENERATED_MARKER
+    except (IOError, OSError):
+        return False
+
+
+def write(compiled_file, text):
+    if os.path.exists(compiled_file) and not is_generated(compiled_file):
+        raise ValueError(
+            'refusing to overwrite {}: not generated by argutil'.format(
+                compiled_file
+            )
+        )
+    fileio.write_if_changed(compiled_file, text)
+    with _compiled_lock:
+        COMPILED.pop(compiled_file, None)
+
+
+# Loading
+
+def import_file(compiled_file):
+    name = 'argutil_compiled_' + str(abs(hash(compiled_file)))
+    try:
+        from importlib.util import spec_from_file_location, module_from_spec
+    except ImportError:
+        import imp
+        return imp.load_source(name, compiled_file)
+    spec = spec_from_file_location(name, compiled_file)
+    compiled = module_from_spec(spec)
+    spec.loader.exec_module(compiled)
+    return compiled
+
+
+def is_fresh(compiled, module, plugins=None):
+    if getattr(compiled, 'VERSION', None) != COMPILER_VERSION:
+        return False
+    if getattr(compiled, 'MODULE', None) != module:
+        return False
+    # Plugin subcommands are only compiled in when plugins were enabled, for
+    # the distributions installed at the time (see argutil.plugins.get_key)
+    if getattr(compiled, 'PLUGINS', None) != plugins:
+        return False
+    dirname = os.path.dirname(compiled.__file__)
+    return all(
+        cache.is_fresh([os.path.join(dirname, source[0])] + source[1:])
+        for source in compiled.SOURCES
+    )
+
+
+def load(compiled_file, module, plugins=None):
+    try:
+        st = os.stat(compiled_file)
+    except OSError:
+        return None
+    key = (st.st_mtime, st.st_size)
+    with _compiled_lock:
+        memo = COMPILED.get(compiled_file)
+    if memo is None or memo[0] != key:
+        if not is_generated(compiled_file):
+            return None
+        try:
+            compiled = import_file(compiled_file)
+        except Exception as e:
+            from .argutil import logger
+            logger.warning('could not load {}: {}'.format(compiled_file, e))
+            return None
+        memo = (key, compiled)
+        with _compiled_lock:
+            COMPILED[compiled_file] = memo
+    compiled = memo[1]
+    if not is_fresh(compiled, module, plugins):
+        return None
+    return compiled
@@ -0,0 +1,158 @@
+##
+#  @package argutil.completion
+#  Shell completion answered from a precomputed index of the parser tree
+
+import json
+import os
+from . import cache
+from . import fileio
+
+try:
+    from shlex import quote
+except ImportError:
+    from pipes import quote
+
+INDEX_VERSION = 1
+
+# Actions whose options never consume the following word
+NO_VALUE_ACTIONS = [
+    'store_true', 'store_false', 'store_const', 'append_const', 'count',
+    'help', 'version',
+]
+
+HELP_FLAGS = ['-h', '--help']
+
+BASH_SHIM = '''\
+_argutil_complete_{name}() {{
+    local IFS=$'\\n'
+    COMPREPLY=($({command} "${{COMP_WORDS[@]:1:COMP_CWORD}}"))
+}}
+complete -o default -F _argutil_complete_{name} {prog}
+'''
+
+ZSH_SHIM = '''\
+#compdef {prog}
+_argutil_complete_{name}() {{
+    local -a candidates
+    candidates=("${{(@f)$({command} "${{(@)words[2,CURRENT]}}")}}")
+    compadd -a candidates
+}}
+compdef _argutil_complete_{name} {prog}
+'''
+
+SHIMS = {
+    'bash': BASH_SHIM,
+    'zsh': ZSH_SHIM,
+}
+
+
+def build_node(definition):
+    node = {
+        'options': {flag: [False, None] for flag in HELP_FLAGS},
+        'choices': [],
+        'commands': {},
+        'aliases': {},
+    }
+    for param in definition.get('args', []):
+        flags = [param['long']]
+        if 'short' in param:
+            flags.insert(0, param['short'])
+        choices = param.get('choices')
+        if param['long'].startswith('-'):
+            takes_value = (
+                param.get('action') not in NO_VALUE_ACTIONS and
+                param.get('nargs') != '0'
+            )
+            for flag in flags:
+                node['options'][flag] = [takes_value, choices]
+        elif choices:
+            node['choices'].extend(choices)
+    for name, submodule in definition.get('modules', {}).items():
+        node['commands'][name] = build_node(submodule)
+        for alias in submodule.get('aliases', []):
+            node['aliases'][alias] = name
+    return node
+
+
+def build_index(parser_def, definition, sources):
+    return {
+        'version': INDEX_VERSION,
+        'script': parser_def.filepath,
+        'definitions_file': parser_def.definitions_file,
+        'defaults_file': parser_def.defaults_file,
+        'plugins': parser_def.plugins,
+        'sources': sources,
+        'root': build_node(definition),
+    }
+
+
+def write(index_file, index):
+    fileio.write_if_changed(index_file, json.dumps(index))
+
+
+def read(index_file):
+    try:
+        with open(index_file, 'r') as f:
+            index = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if index.get('version') != INDEX_VERSION:
+        return None
+    return index
+
+
+def is_fresh(index):
+    return all(cache.is_fresh(source) for source in index['sources'])
+
+
+def load(index_file):
+    index = read(index_file)
+    if index is None or is_fresh(index):
+        return index
+    from .argutil import ParserDefinition
+    ParserDefinition(
+        index['script'],
+        index['definitions_file'],
+        index['defaults_file'],
+        plugins=index.get('plugins')
+    ).completion(index_file)
+    return read(index_file)
+
+
+def complete(index, words):
+    node = index['root']
+    words = list(words) or ['']
+    current = words.pop()
+    expects_value = None
+    for word in words:
+        if expects_value is not None:
+            expects_value = None
+        elif word.startswith('-'):
+            option = node['options'].get(word.split('=', 1)[0])
+            if option is not None and option[0] and '=' not in word:
+                expects_value = option
+        else:
+            name = node['aliases'].get(word, word)
+            if name in node['commands']:
+                node = node['commands'][name]
+    if expects_value is not None:
+        candidates = expects_value[1] or []
+    elif current.startswith('-'):
+        candidates = list(node['options'])
+    else:
+        candidates = (
+            list(node['commands']) + list(node['aliases']) + node['choices']
+        )
+    return sorted(c for c in candidates if c.startswith(current))
+
+
+def get_shim(shell, prog, command):
+    name = ''.join(c if c.isalnum() else '_' for c in prog)
+    return SHIMS[shell].format(name=name, prog=prog, command=command)
+
+
+def get_command(python, index_file):
+    return '{} -m argutil complete {}'.format(
+        quote(python),
+        quote(os.path.abspath(index_file))
+    )
@@ -0,0 +1,387 @@
+##
+#  @package argutil.daemon
+#  Resident parsers served over a local Unix socket
+#
+#  The daemon keeps resolved definitions and built parsers in memory and
+#  parses argv for short-lived clients. Definitions whose parsing depends on
+#  the client's env (types or help/defaults formatted from its registries)
+#  are answered with a fallback, and the client parses in-process. So are
+#  clients whose interpreter, ARGUTIL_* settings or installed plugins differ
+#  from the daemon's, since the daemon reads definitions in its own process.
+
+import logging
+import os
+import struct
+import sys
+import threading
+from contextlib import contextmanager
+from . import backend
+from . import cache
+from . import defaults
+from . import fileio
+from . import plugins
+from . import snapshot
+from .primitives import primitives
+from .registry import Environment
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+logger = logging.getLogger('argutil')
+
+DAEMON_ENV_VAR = 'ARGUTIL_DAEMON'
+SOCKET_FILE = 'daemon.sock'
+CONNECT_TIMEOUT = 0.5
+REQUEST_TIMEOUT = 60
+
+LENGTH = struct.Struct('>I')
+
+FALLBACK = {'status': 'fallback'}
+
+# Settings that change how definitions are read; the plugins setting is sent
+# resolved, as the key of the installed plugins
+CONTEXT_ENV_VARS = [
+    cache.CACHE_ENV_VAR,
+    cache.CACHE_DIR_ENV_VAR,
+    backend.BACKEND_ENV_VAR,
+]
+
+
+def enabled(daemon=None):
+    return defaults.get_flag(daemon, DAEMON_ENV_VAR)
+
+
+def get_socket_path(socket_path=None):
+    socket_path = socket_path or os.environ.get(DAEMON_ENV_VAR, '')
+    if socket_path and not defaults.is_on(socket_path):
+        return socket_path
+    return os.path.join(fileio.get_runtime_dir(), SOCKET_FILE)
+
+
+# The socket's directory must be private (see fileio.is_private), and the
+# socket itself not accessible by anyone else
+
+def is_trusted(socket_path):
+    dirname = os.path.dirname(os.path.abspath(socket_path))
+    return (
+        fileio.is_private(dirname, 0o022) and
+        fileio.is_private(socket_path, 0o077)
+    )
+
+
+def is_trusted_peer(sock):
+    import socket
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return True
+    creds = struct.Struct('3i')
+    try:
+        _, uid, _ = creds.unpack(
+            sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, creds.size)
+        )
+    except (socket.error, struct.error):
+        return False
+    return uid == os.getuid()
+
+
+def get_environ():
+    return {name: os.environ.get(name) for name in CONTEXT_ENV_VARS}
+
+
+def get_context(parser_def):
+    return {
+        'prefix': sys.prefix,
+        'environ': get_environ(),
+        'plugins': parser_def.__get_plugins_key__(),
+    }
+
+
+def is_local(context):
+    return (
+        context['prefix'] == sys.prefix and
+        context['environ'] == get_environ() and
+        context['plugins'] in [None, plugins.get_key()]
+    )
+
+
+def make_socket_dir(socket_path):
+    fileio.make_private_dir(os.path.dirname(os.path.abspath(socket_path)))
+
+
+# Wire format: length-prefixed argutil snapshots, which also reject a peer
+# running a different Python version
+
+def send(sock, message):
+    data = snapshot.dumps(message)
+    sock.sendall(LENGTH.pack(len(data)) + data)
+
+
+def recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 16))
+        if not chunk:
+            raise EOFError('connection closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv(sock):
+    size = LENGTH.unpack(recv_exactly(sock, LENGTH.size))[0]
+    return snapshot.loads(recv_exactly(sock, size))
+
+
+# Server
+
+class Dispatch(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class ThreadLocalStream(object):
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def __getattr__(self, name):
+        stream = getattr(self.local, 'buffer', None) or self.stream
+        return getattr(stream, name)
+
+    @contextmanager
+    def capture(self):
+        self.local.buffer = StringIO()
+        try:
+            yield self.local.buffer
+        finally:
+            self.local.buffer = None
+
+
+def install_streams():
+    if not isinstance(sys.stdout, ThreadLocalStream):
+        sys.stdout = ThreadLocalStream(sys.stdout)
+    if not isinstance(sys.stderr, ThreadLocalStream):
+        sys.stderr = ThreadLocalStream(sys.stderr)
+
+
+def has_fields(value):
+    try:
+        return '{' in value or '}' in value
+    except TypeError:
+        return False
+
+
+class Analysis(object):
+    def __init__(self, definition, module_defaults):
+        self.types = set()
+        self.commands = set()
+        self.formatted = False
+        self.__visit__(definition, module_defaults)
+
+    def __visit__(self, definition, module_defaults):
+        for param in definition.get('args', []):
+            if 'type' in param:
+                self.types.add(param['type'])
+            if param.get('help') and has_fields('\n'.join(param['help'])):
+                self.formatted = True
+        for v in module_defaults.values():
+            if not isinstance(v, dict) and has_fields(v):
+                self.formatted = True
+        for name, submodule in definition.get('modules', {}).items():
+            self.commands.add(name)
+            self.__visit__(submodule, module_defaults.get(name, {}))
+
+    def is_buildable(self):
+        return (
+            not self.formatted and
+            all(t in primitives for t in self.types) and
+            not self.types & self.commands
+        )
+
+    def supports(self, env_names):
+        return not self.types & set(env_names)
+
+
+class Entry(object):
+    def __init__(self, parser_def):
+        from .argutil import __build_parser__
+        self.sources = [
+            cache.stamp(source) for source in parser_def.__get_sources__()
+        ]
+        definition, module_defaults = parser_def.__get_resolved__()
+        self.analysis = Analysis(definition, module_defaults)
+        self.parser = None
+        if self.analysis.is_buildable():
+            env = Environment({
+                name: Dispatch(name) for name in self.analysis.commands
+            })
+            self.parser = __build_parser__(
+                parser_def.module,
+                definition,
+                dict(module_defaults),
+                env
+            )
+
+    def is_fresh(self):
+        return all(cache.is_fresh(source) for source in self.sources)
+
+    def supports(self, env_names):
+        return self.parser is not None and self.analysis.supports(env_names)
+
+
+class Daemon(object):
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get_entry(self, request):
+        from .argutil import ParserDefinition
+        context = request['context']
+        key = (
+            request['script'],
+            request['definitions_file'],
+            request['defaults_file'],
+            context['plugins'],
+            context['prefix'],
+            tuple(sorted(context['environ'].items())),
+        )
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None or not entry.is_fresh():
+            entry = Entry(ParserDefinition(
+                *key[:3],
+                plugins=context['plugins'] is not None
+            ))
+            with self.lock:
+                self.entries[key] = entry
+        return entry
+
+    def parse(self, request):
+        if not is_local(request['context']):
+            return FALLBACK
+        entry = self.get_entry(request)
+        if not entry.supports(request['env']):
+            return FALLBACK
+        with sys.stdout.capture() as stdout, sys.stderr.capture() as stderr:
+            try:
+                namespace = vars(entry.parser.parse_args(request['argv']))
+            except SystemExit as e:
+                return {
+                    'status': 'exit',
+                    'code': e.code,
+                    'stdout': stdout.getvalue(),
+                    'stderr': stderr.getvalue(),
+                }
+        func = namespace.pop('func', None)
+        return {
+            'status': 'ok',
+            'namespace': namespace,
+            'dispatch': func.name if isinstance(func, Dispatch) else None,
+        }
+
+
+def get_server_class():
+    try:
+        import socketserver
+    except ImportError:
+        import SocketServer as socketserver
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            try:
+                request = recv(self.request)
+                response = self.server.daemon.parse(request)
+            except Exception as e:
+                logger.warning('could not handle request: {}'.format(e))
+                response = FALLBACK
+            try:
+                send(self.request, response)
+            except ValueError:
+                send(self.request, FALLBACK)
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def __init__(self, socket_path):
+            make_socket_dir(socket_path)
+            install_streams()
+            self.daemon = Daemon()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            umask = os.umask(0o077)
+            try:
+                socketserver.UnixStreamServer.__init__(
+                    self,
+                    socket_path,
+                    Handler
+                )
+            finally:
+                os.umask(umask)
+
+    return Server
+
+
+def serve(socket_path=None):
+    socket_path = get_socket_path(socket_path)
+    server = get_server_class()(socket_path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+
+
+# Client
+
+def request(message, socket_path=None):
+    import socket
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    socket_path = get_socket_path(socket_path)
+    if not is_trusted(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path)
+        if not is_trusted_peer(sock):
+            logger.warning('daemon at {} is run by another user'.format(
+                socket_path
+            ))
+            return None
+        sock.settimeout(REQUEST_TIMEOUT)
+        send(sock, message)
+        return recv(sock)
+    except (socket.error, ValueError, EOFError, struct.error):
+        return None
+    finally:
+        sock.close()
+
+
+def parse_args(parser_def, args, env, get_parser):
+    from argparse import Namespace
+    response = request({
+        'script': parser_def.filepath,
+        'definitions_file': parser_def.definitions_file,
+        'defaults_file': parser_def.defaults_file,
+        'context': get_context(parser_def),
+        'argv': list(args),
+        'env': sorted(env),
+    })
+    if response is None or response['status'] == 'fallback':
+        return None
+    if response['status'] == 'exit':
+        sys.stdout.write(response['stdout'])
+        sys.stderr.write(response['stderr'])
+        sys.exit(response['code'])
+    namespace = Namespace(**response['namespace'])
+    name = response['dispatch']
+    if name is not None:
+        if name in env:
+            namespace.func = env[name]
+        else:
+            def usage(*a, **kwargs):
+                return get_parser().parse_args(args).func(*a, **kwargs)
+            namespace.func = usage
+    return namespace
@@ -1,3 +1,25 @@
+import os
+
 TEMPLATE_FILE = 'template.py'
 DEFINITIONS_FILE = 'commandline.json'
 DEFAULTS_FILE = 'defaults.json'
+COMPILED_FILE = '{module}_parser.py'
+COMPLETION_FILE = '{module}_completion.json'
+
+# Environment variable values that turn a flag off or on
+OFF = ['', '0', 'false', 'no', 'off']
+ON = ['1', 'true', 'yes', 'on']
+
+
+def is_off(value):
+    return value.lower() in OFF
+
+
+def is_on(value):
+    return value.lower() in ON
+
+
+def get_flag(value, env_var):
+    if value is None:
+        return not is_off(os.environ.get(env_var, ''))
+    return bool(value)
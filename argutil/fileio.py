@@ -0,0 +1,203 @@
+##
+#  @package argutil.fileio
+#  Atomic writes and advisory file locking for definitions and defaults files
+
+import itertools
+import os
+import threading
+from contextlib import contextmanager
+import logging
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+logger = logging.getLogger('argutil')
+
+LOCK_SUFFIX = '.lock'
+RUNTIME_DIR = 'argutil-{uid}'
+LOCK_DIR = 'locks'
+
+replace = getattr(os, 'replace', os.rename)
+
+_path_locks = {}
+_path_locks_lock = threading.Lock()
+_tmp_counter = itertools.count()
+
+
+def get_tmp_path(filepath):
+    dirname, basename = os.path.split(os.path.abspath(filepath))
+    return os.path.join(dirname, '.{}.{}.{}.tmp'.format(
+        basename,
+        os.getpid(),
+        next(_tmp_counter)
+    ))
+
+
+def write_atomic(filepath, text):
+    tmp_path = get_tmp_path(filepath)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(text, bytes) else 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(filepath).st_mode & 0o7777)
+        except OSError:
+            pass
+        replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_if_changed(filepath, text):
+    try:
+        with open(filepath, 'r') as f:
+            if f.read() == text:
+                return False
+    except (IOError, OSError):
+        pass
+    write_atomic(filepath, text)
+    return True
+
+
+def get_runtime_dir():
+    base = (
+        os.environ.get('XDG_RUNTIME_DIR') or
+        os.environ.get('TMPDIR') or
+        os.environ.get('TEMP') or
+        '/tmp'
+    )
+    uid = getattr(os, 'getuid', lambda: 0)()
+    return os.path.join(base, RUNTIME_DIR.format(uid=uid))
+
+
+# Directories shared with other users (such as /tmp) must belong to the
+# current user and must not be writable by anyone else; otherwise another
+# local user could hold our locks or stand in for the daemon
+
+def is_private(path, mask):
+    getuid = getattr(os, 'getuid', None)
+    if getuid is None:
+        return False
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return st.st_uid == getuid() and not st.st_mode & mask
+
+
+def make_private_dir(dirname):
+    try:
+        os.makedirs(dirname, 0o700)
+    except OSError:
+        if not os.path.isdir(dirname):
+            raise
+    # Without user ids (Windows) the user's temp directory is private
+    if hasattr(os, 'getuid') and not is_private(dirname, 0o022):
+        raise OSError(
+            '{} must belong to the current user and not be writable by '
+            'others'.format(dirname)
+        )
+
+
+# Lock files live in the runtime directory, named after the locked path,
+# so that none are left next to definitions and defaults files
+
+def get_lock_path(filepath):
+    import hashlib
+    key = hashlib.sha1(os.path.abspath(filepath).encode('utf-8'))
+    return os.path.join(
+        get_runtime_dir(),
+        LOCK_DIR,
+        key.hexdigest() + LOCK_SUFFIX
+    )
+
+
+class PathLock(object):
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self.rlock = threading.RLock()
+        self.depth = 0
+        self.fd = None
+
+    def acquire(self):
+        self.rlock.acquire()
+        try:
+            if self.depth == 0:
+                self.fd = self.__lock_file__()
+            self.depth += 1
+        except BaseException:
+            self.rlock.release()
+            raise
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0 and self.fd is not None:
+            fd, self.fd = self.fd, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
+        self.rlock.release()
+
+    def __lock_file__(self):
+        if fcntl is None and msvcrt is None:
+            return None
+        try:
+            make_private_dir(os.path.dirname(os.path.dirname(self.lock_path)))
+            make_private_dir(os.path.dirname(self.lock_path))
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError as e:
+            logger.debug('could not open lock file {}: {}'.format(
+                self.lock_path, e
+            ))
+            return None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+
+def get_lock(filepath):
+    lock_path = get_lock_path(filepath)
+    with _path_locks_lock:
+        if lock_path not in _path_locks:
+            _path_locks[lock_path] = PathLock(lock_path)
+        return _path_locks[lock_path]
+
+
+@contextmanager
+def locked(*filepaths):
+    locks = [
+        get_lock(f) for f in sorted(set(os.path.abspath(f) for f in filepaths))
+    ]
+    acquired = []
+    try:
+        for lock in locks:
+            lock.acquire()
+            acquired.append(lock)
+        yield
+    finally:
+        for lock in reversed(acquired):
+            lock.release()
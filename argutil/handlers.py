@@ -0,0 +1,57 @@
+##
+#  @package argutil.handlers
+#  Subcommand handlers named by "package.module:function" and imported on
+#  first call
+
+import importlib
+import threading
+
+HANDLERS = {}
+_lock = threading.Lock()
+
+
+def split(spec):
+    module_name, sep, attr = spec.partition(':')
+    if not sep or not module_name or not attr:
+        raise ValueError(
+            'handler must be "package.module:function", not {!r}'.format(spec)
+        )
+    return module_name, attr
+
+
+def resolve(spec):
+    try:
+        return HANDLERS[spec]
+    except KeyError:
+        pass
+    module_name, attr = split(spec)
+    handler = importlib.import_module(module_name)
+    for name in attr.split('.'):
+        handler = getattr(handler, name)
+    with _lock:
+        HANDLERS[spec] = handler
+    return handler
+
+
+class LazyHandler(object):
+    def __init__(self, spec):
+        split(spec)
+        self.spec = spec
+
+    def resolve(self):
+        return resolve(self.spec)
+
+    def __call__(self, *args, **kwargs):
+        return resolve(self.spec)(*args, **kwargs)
+
+    def __eq__(self, other):
+        return isinstance(other, LazyHandler) and self.spec == other.spec
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.spec)
+
+    def __repr__(self):
+        return 'LazyHandler({!r})'.format(self.spec)
@@ -0,0 +1,105 @@
+##
+#  @package argutil.inheritance
+#  Template inheritance resolution for parser definitions
+
+
+class TemplateResolver(object):
+    def __init__(self, templates, parent=None):
+        self.templates = templates
+        self.parent = parent
+        self.resolved = {}
+
+    def __contains__(self, name):
+        return name in self.templates or (
+            self.parent is not None and name in self.parent
+        )
+
+    def get(self, name):
+        if name in self.templates:
+            return self.__resolve__(name, [])
+        if self.parent is not None:
+            return self.parent.get(name)
+        raise KeyError('unknown template ' + name)
+
+    def __resolve__(self, name, chain):
+        if name in self.resolved:
+            return self.resolved[name]
+        if name in chain:
+            raise ValueError(
+                'template inheritance cycle: ' + ' -> '.join(chain + [name])
+            )
+        template = self.templates[name]
+        if 'parent' in template:
+            parent_name = template['parent']
+            if parent_name in self.templates:
+                parent = self.__resolve__(parent_name, chain + [name])
+            elif self.parent is not None and parent_name in self.parent:
+                parent = self.parent.get(parent_name)
+            else:
+                raise KeyError('unknown parent template ' + parent_name)
+            resolved = merge(parent, template)
+        else:
+            resolved = merge({}, template)
+        self.resolved[name] = resolved
+        return resolved
+
+    def resolve_all(self):
+        for name in self.templates:
+            self.__resolve__(name, [])
+        return self.resolved
+
+
+def merge(parent, child):
+    merged = {
+        k: v for k, v in parent.items()
+        if k not in ['args', 'examples']
+    }
+    merged.update(
+        (k, v) for k, v in child.items()
+        if k not in ['args', 'examples', 'parent']
+    )
+    args = {}
+    for arg in parent.get('args', ()) + tuple(child.get('args', ())):
+        args[arg['long']] = arg
+    merged['args'] = tuple(args.values())
+    merged['examples'] = (
+        parent.get('examples', ()) + tuple(child.get('examples', ()))
+    )
+    return merged
+
+
+def resolve_definition(definition, resolver=None):
+    resolved = {}
+    for k in ['help', 'aliases', 'handler']:
+        if k in definition:
+            resolved[k] = definition[k]
+
+    if 'template' in definition:
+        template_name = definition['template']
+        if resolver is None or template_name not in resolver:
+            raise KeyError('unknown template ' + template_name)
+        template = resolver.get(template_name)
+    else:
+        template = {}
+
+    examples = list(template.get('examples', ()))
+    examples += definition.get('examples') or []
+    if examples:
+        resolved['examples'] = examples
+
+    args = list(definition.get('args', []))
+    args += template.get('args', ())
+    if args:
+        resolved['args'] = args
+
+    if 'templates' in definition:
+        resolver = TemplateResolver(definition['templates'], resolver)
+        resolver.resolve_all()
+
+    if 'modules' in definition:
+        resolved['modules'] = {
+            submodule_name: resolve_definition(submodule, resolver)
+            for submodule_name, submodule in definition['modules'].items()
+        }
+
+    return resolved
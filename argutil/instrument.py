@@ -0,0 +1,217 @@
+##
+#  @package argutil.instrument
+#  Opt-in timing of parser pipeline stages and counting of their work
+#
+#  Stages (load, validate, resolve, build, apply_defaults, parse_args, ...)
+#  and counters (parsers and arguments built, cache hits and misses) are only
+#  recorded while a profiler is active. The report is JSON, or a Chrome trace
+#  (chrome://tracing, Perfetto) with one complete event per stage.
+
+import atexit
+import json
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from . import defaults
+
+try:
+    from time import perf_counter as clock
+except ImportError:
+    from time import time as clock
+
+PROFILE_ENV_VAR = 'ARGUTIL_PROFILE'
+PROFILE_FORMAT_ENV_VAR = 'ARGUTIL_PROFILE_FORMAT'
+
+_active = None
+
+
+class Profiler(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start = clock()
+        self.events = []
+        self.counters = {}
+
+    def record(self, name, start, end, args):
+        event = (name, start, end, threading.current_thread().ident, args)
+        with self.lock:
+            self.events.append(event)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        with self.lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+        stages = {}
+        for name, start, end, _, _ in events:
+            stage = stages.setdefault(name, {'calls': 0, 'total_ms': 0.0})
+            stage['calls'] += 1
+            stage['total_ms'] += (end - start) * 1000
+        return {
+            'argv': list(sys.argv),
+            'stages': stages,
+            'counters': counters,
+            'events': [
+                {
+                    'name': name,
+                    'start_ms': (start - self.start) * 1000,
+                    'duration_ms': (end - start) * 1000,
+                    'thread': thread,
+                    'args': args,
+                }
+                for name, start, end, thread, args in events
+            ],
+        }
+
+    def trace(self):
+        with self.lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {
+                    'name': name,
+                    'cat': 'argutil',
+                    'ph': 'X',
+                    'ts': (start - self.start) * 1e6,
+                    'dur': (end - start) * 1e6,
+                    'pid': pid,
+                    'tid': thread,
+                    'args': args,
+                }
+                for name, start, end, thread, args in events
+            ],
+            'displayTimeUnit': 'ms',
+            'otherData': {'argv': list(sys.argv), 'counters': counters},
+        }
+
+    def dumps(self, format='json'):
+        if format == 'chrome':
+            return json.dumps(self.trace())
+        if format == 'json':
+            return json.dumps(self.report(), indent=2, sort_keys=True)
+        raise ValueError('unknown profile format: {!r}'.format(format))
+
+    def write(self, output, format=None):
+        text = self.dumps(get_format(output, format))
+        if output == '-':
+            sys.stderr.write(text + '\n')
+        else:
+            with open(output, 'w') as f:
+                f.write(text)
+
+
+class Stage(object):
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.start, clock(), self.args)
+
+
+class NullStage(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_STAGE = NullStage()
+
+
+def get_format(output, format=None):
+    format = format or os.environ.get(PROFILE_FORMAT_ENV_VAR)
+    if format:
+        return format
+    if '.trace' in os.path.basename(output):
+        return 'chrome'
+    return 'json'
+
+
+def stage(name, **args):
+    profiler = _active
+    if profiler is None:
+        return NULL_STAGE
+    return Stage(profiler, name, args)
+
+
+def count(name, n=1):
+    profiler = _active
+    if profiler is not None:
+        profiler.count(name, n)
+
+
+def active():
+    return _active
+
+
+def time_parser(parser):
+    # parse_args goes through parse_known_args; subparsers are parsed within
+    parse_known_args = parser.parse_known_args
+
+    def timed_parse_known_args(*args, **kwargs):
+        with stage('parse_args'):
+            return parse_known_args(*args, **kwargs)
+    parser.parse_known_args = timed_parse_known_args
+    return parser
+
+
+def start():
+    global _active
+    _active = Profiler()
+    return _active
+
+
+def stop():
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+@contextmanager
+def profile(output=None, format=None):
+    profiler = start()
+    try:
+        yield profiler
+    finally:
+        stop()
+        if output is not None:
+            profiler.write(output, format)
+
+
+def get_output(output=None):
+    output = output or os.environ.get(PROFILE_ENV_VAR, '')
+    if defaults.is_off(output):
+        return None
+    if defaults.is_on(output):
+        return '-'
+    return output
+
+
+def enable_from_environ():
+    output = get_output()
+    if output is None or _active is not None:
+        return None
+    profiler = start()
+
+    def write():
+        try:
+            profiler.write(output)
+        except (IOError, OSError, ValueError) as e:
+            sys.stderr.write(
+                'argutil: could not write profile: {}\n'.format(e)
+            )
+    atexit.register(write)
+    return profiler
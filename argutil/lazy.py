@@ -0,0 +1,67 @@
+##
+#  @package argutil.lazy
+#  Subparsers that are only constructed when selected on the command line
+
+from argparse import ArgumentError, _SubParsersAction
+
+
+class LazyParser(object):
+    def __init__(self, factory):
+        self.factory = factory
+        self.parser = None
+
+    def get(self):
+        if self.parser is None:
+            self.parser = self.factory()
+            self.factory = None
+        return self.parser
+
+
+class LazyParserMap(dict):
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, LazyParser):
+            value = value.get()
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def is_built(self, key):
+        return not isinstance(dict.__getitem__(self, key), LazyParser)
+
+
+class LazySubParsersAction(_SubParsersAction):
+    def __init__(self, *args, **kwargs):
+        super(LazySubParsersAction, self).__init__(*args, **kwargs)
+        self._name_parser_map = LazyParserMap()
+        self.choices = self._name_parser_map
+
+    def add_lazy_parser(self, name, factory, **kwargs):
+        aliases = kwargs.pop('aliases', ())
+
+        for key in [name] + list(aliases):
+            if key in self._name_parser_map:
+                raise ArgumentError(
+                    self,
+                    'conflicting subparser: {}'.format(key)
+                )
+
+        if 'help' in kwargs:
+            help = kwargs.pop('help')
+            choice_action = self._ChoicesPseudoAction(name, aliases, help)
+            self._choices_actions.append(choice_action)
+
+        placeholder = LazyParser(factory)
+        for key in [name] + list(aliases):
+            self._name_parser_map[key] = placeholder
+        return placeholder
@@ -0,0 +1,183 @@
+##
+#  @package argutil.plugins
+#  Subcommands contributed by installed distributions through entry points
+#
+#  A distribution adds a subcommand with an entry point in the
+#  'argutil.modules' group, named by its module path ('tool/sub') and
+#  pointing at a module definition or a callable returning one. Discovered
+#  definitions are kept in an index that is only rebuilt when the installed
+#  distribution metadata (*.dist-info and *.egg-info entries on sys.path)
+#  changes, so startups neither read entry points nor import plugin packages.
+
+import logging
+import os
+import sys
+import threading
+from . import cache
+from . import defaults
+from . import schema
+from . import snapshot
+from .inheritance import resolve_definition
+
+logger = logging.getLogger('argutil')
+
+ENTRY_POINT_GROUP = 'argutil.modules'
+PLUGINS_ENV_VAR = 'ARGUTIL_PLUGINS'
+INDEX_VERSION = 1
+INDEX_FILE = 'argutil-plugins-{}.snapshot'
+METADATA_SUFFIXES = ('.dist-info', '.egg-info')
+SEPARATOR = '/'
+
+_index = None
+_merged = {}
+_lock = threading.Lock()
+
+
+def enabled(plugins=None):
+    return defaults.get_flag(plugins, PLUGINS_ENV_VAR)
+
+
+def get_sources():
+    # Only distribution metadata is stamped: the directories themselves also
+    # change when scripts next to them are edited, compiled or configured
+    sources = []
+    paths = []
+    for path in sys.path:
+        path = os.path.abspath(path or os.curdir)
+        if path in paths:
+            continue
+        paths.append(path)
+        try:
+            names = os.listdir(path)
+        except OSError:
+            continue
+        sources += [
+            os.path.join(path, name) for name in sorted(names)
+            if name.endswith(METADATA_SUFFIXES)
+        ]
+    return sources
+
+
+def get_key(sources=None):
+    if sources is None:
+        sources = get_sources()
+    return cache.digest('\0'.join([sys.prefix] + sources).encode('utf-8'))
+
+
+def get_index_path(sources, cache_dir=None):
+    cache_dir = (
+        cache_dir or
+        os.environ.get(cache.CACHE_DIR_ENV_VAR) or
+        cache.xdg_cache_dir()
+    )
+    return os.path.join(cache_dir, INDEX_FILE.format(get_key(sources)[:16]))
+
+
+def iter_entry_points():
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        import pkg_resources
+        return list(pkg_resources.iter_entry_points(ENTRY_POINT_GROUP))
+    found = entry_points()
+    if hasattr(found, 'select'):
+        return list(found.select(group=ENTRY_POINT_GROUP))
+    return list(found.get(ENTRY_POINT_GROUP, []))
+
+
+def load_definition(entry_point):
+    definition = entry_point.load()
+    if not isinstance(definition, dict):
+        definition = definition()
+    return schema.check_module(definition)
+
+
+def build_index(sources):
+    modules = {}
+    for entry_point in iter_entry_points():
+        if entry_point.name in modules:
+            continue
+        try:
+            modules[entry_point.name] = load_definition(entry_point)
+        except Exception as e:
+            logger.warning('could not load plugin {}: {}'.format(
+                entry_point.name, e
+            ))
+    return {
+        'version': INDEX_VERSION,
+        'sources': [cache.stamp(source) for source in sources],
+        'modules': modules,
+    }
+
+
+def is_fresh(index, sources):
+    return (
+        [source[0] for source in index['sources']] == sources and
+        all(cache.is_fresh(source) for source in index['sources'])
+    )
+
+
+def get_index(cache_dir=None):
+    global _index
+    sources = get_sources()
+    index = _index
+    if index is not None and is_fresh(index, sources):
+        return index
+    index_path = get_index_path(sources, cache_dir)
+    index = snapshot.read(index_path)
+    if (
+        not isinstance(index, dict) or
+        index.get('version') != INDEX_VERSION or
+        not is_fresh(index, sources)
+    ):
+        index = build_index(sources)
+        cache.write_text(index_path, snapshot.dumps(index))
+    with _lock:
+        _index = index
+    return index
+
+
+def get_module_paths(index, module):
+    prefix = module + SEPARATOR
+    paths = [path for path in index['modules'] if path.startswith(prefix)]
+    # Parents before children, so nested plugins find their parent
+    return sorted(paths, key=lambda path: (path.count(SEPARATOR), path))
+
+
+def insert(definition, path, plugin):
+    names = path.split(SEPARATOR)[1:]
+    parent = definition
+    for name in names[:-1]:
+        modules = parent.get('modules', {})
+        if name not in modules:
+            logger.warning('no parent module for plugin ' + path)
+            return definition
+        child = dict(modules[name])
+        parent['modules'] = dict(modules)
+        parent['modules'][name] = child
+        parent = child
+    modules = parent.get('modules', {})
+    if names[-1] in modules:
+        logger.warning('plugin {} conflicts with a defined module'.format(
+            path
+        ))
+        return definition
+    parent['modules'] = dict(modules)
+    parent['modules'][names[-1]] = resolve_definition(plugin)
+    return definition
+
+
+def merge(definition, module, index):
+    paths = get_module_paths(index, module)
+    if not paths:
+        return definition
+    with _lock:
+        memo = _merged.get(module)
+    if memo is not None and memo[0] is definition and memo[1] is index:
+        return memo[2]
+    merged = dict(definition)
+    for path in paths:
+        merged = insert(merged, path, index['modules'][path])
+    with _lock:
+        _merged[module] = (definition, index, merged)
+    return merged
@@ -0,0 +1,136 @@
+##
+#  @package argutil.registry
+#  Scoped, thread-safe registries of callables available to parsers
+
+import threading
+from string import Formatter
+
+try:
+    from collections.abc import Mapping, MutableMapping
+except ImportError:
+    from collections import Mapping, MutableMapping
+
+
+class Registry(MutableMapping):
+    def __init__(self, entries=None, parent=None):
+        self._lock = threading.Lock()
+        self._entries = dict(entries or {})
+        self.parent = parent
+
+    def maps(self):
+        # Each published dict is never mutated again, so readers can use
+        # it without taking the lock
+        maps = [self._entries]
+        if self.parent is not None:
+            maps += self.parent.maps()
+        return maps
+
+    def snapshot(self):
+        return Environment.shared(*self.maps())
+
+    def scope(self, entries=None):
+        return Registry(entries, parent=self)
+
+    def callable(self, name=None):
+        def decorator(function):
+            self[name or function.__name__] = function
+            return function
+        return decorator
+
+    def update(self, *args, **kwargs):
+        with self._lock:
+            entries = dict(self._entries)
+            entries.update(*args, **kwargs)
+            self._entries = entries
+
+    def __getitem__(self, name):
+        return self.snapshot()[name]
+
+    def __setitem__(self, name, value):
+        self.update({name: value})
+
+    def __delitem__(self, name):
+        with self._lock:
+            entries = dict(self._entries)
+            del entries[name]
+            self._entries = entries
+
+    def __contains__(self, name):
+        return name in self.snapshot()
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def __len__(self):
+        return len(self.snapshot())
+
+    def __repr__(self):
+        return 'Registry({!r})'.format(dict(self.items()))
+
+
+class Environment(Mapping):
+    def __init__(self, *maps):
+        self.maps = maps
+        self.formatted = None
+
+    @classmethod
+    def shared(cls, *maps):
+        # Only for maps that are never mutated, such as the dicts published
+        # by a Registry: formatted strings are then shared between every
+        # environment over the same maps
+        key = tuple(id(entries) for entries in maps)
+        with _shared_lock:
+            env = _shared.get(key)
+            if env is None:
+                if len(_shared) >= MAX_SHARED:
+                    _shared.pop(next(iter(_shared)))
+                env = _shared[key] = cls(*maps)
+        return env
+
+    def __getitem__(self, name):
+        for entries in self.maps:
+            if name in entries:
+                return entries[name]
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        return any(name in entries for entries in self.maps)
+
+    def __iter__(self):
+        seen = set()
+        for entries in self.maps:
+            for name in entries:
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def format(self, template):
+        if '{' not in template and '}' not in template:
+            return template
+        if self.formatted is None:
+            self.formatted = {}
+        try:
+            return self.formatted[template]
+        except KeyError:
+            text = _formatter.vformat(template, (), self)
+            self.formatted[template] = text
+            return text
+
+
+_formatter = Formatter()
+_shared = {}
+_shared_lock = threading.Lock()
+MAX_SHARED = 16
+
+
+def get_maps(env):
+    if env is None:
+        return []
+    if isinstance(env, Registry):
+        return env.maps()
+    if isinstance(env, Environment):
+        return list(env.maps)
+    return [env]
@@ -0,0 +1,155 @@
+##
+#  @package argutil.results
+#  Slotted parse result classes generated from parser definitions
+#
+#  Each module and subcommand path gets a class whose __slots__ are the
+#  attributes argparse sets for it: argument dests, defaults, and 'command'
+#  and 'func' for subcommands. Parsed Namespaces are converted to the class
+#  matching their attributes, which pickles as field names and a tuple of
+#  values.
+
+import re
+import threading
+
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Actions whose dest is SUPPRESS and never set on the namespace
+NO_DEST_ACTIONS = ['help', 'version']
+
+CLASSES = {}
+_lock = threading.Lock()
+
+
+class Result(object):
+    __slots__ = ()
+
+    def __init__(self, **kwargs):
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    def _get_kwargs(self):
+        return [
+            (name, getattr(self, name))
+            for name in sorted(self.__slots__)
+            if hasattr(self, name)
+        ]
+
+    def _asdict(self):
+        return dict(self._get_kwargs())
+
+    def __contains__(self, name):
+        return name in self.__slots__ and hasattr(self, name)
+
+    def __eq__(self, other):
+        if isinstance(other, Result):
+            return self._asdict() == other._asdict()
+        try:
+            return self._asdict() == vars(other)
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Namespace({})'.format(', '.join(
+            '{}={!r}'.format(name, value)
+            for name, value in self._get_kwargs()
+        ))
+
+    def __reduce__(self):
+        fields = self.__slots__
+        values = tuple(
+            getattr(self, name) for name in fields if hasattr(self, name)
+        )
+        if len(values) == len(fields):
+            return rebuild, (fields, values)
+        names = tuple(name for name in fields if hasattr(self, name))
+        return rebuild, (fields, values, names)
+
+
+def get_class(fields, name='Namespace'):
+    fields = tuple(sorted(fields))
+    try:
+        return CLASSES[fields]
+    except KeyError:
+        pass
+    if not all(IDENTIFIER.match(field) for field in fields):
+        return None
+    cls = type(name, (Result,), {'__slots__': fields})
+    with _lock:
+        return CLASSES.setdefault(fields, cls)
+
+
+def rebuild(fields, values, names=None):
+    result = Result.__new__(get_class(fields))
+    for name, value in zip(names or fields, values):
+        setattr(result, name, value)
+    return result
+
+
+def get_dest(param):
+    if 'dest' in param:
+        return param['dest']
+    long = param['long']
+    if not long.startswith('-'):
+        return long
+    flags = [param['short'], long] if 'short' in param else [long]
+    for flag in flags:
+        if flag.startswith('--'):
+            break
+    else:
+        flag = flags[0]
+    return flag.lstrip('-').replace('-', '_')
+
+
+def get_class_name(path):
+    return 'Namespace_' + '_'.join(
+        re.sub(r'\W', '_', name) for name in path
+    )
+
+
+class ResultTypes(object):
+    def __init__(self, module, definition, module_defaults):
+        self.types = {}
+        self.__visit__((module,), definition, module_defaults, ())
+
+    def __visit__(self, path, definition, module_defaults, inherited):
+        fields = set(inherited)
+        if len(path) > 1:
+            fields.add('func')
+        fields.update(
+            get_dest(param) for param in definition.get('args', [])
+            if param.get('action') not in NO_DEST_ACTIONS
+        )
+        fields.update(module_defaults)
+        if 'modules' in definition:
+            fields.add('command')
+        cls = get_class(fields, get_class_name(path))
+        if cls is not None:
+            self.types[frozenset(fields)] = cls
+        for name, submodule in definition.get('modules', {}).items():
+            sub_defaults = module_defaults.get(name, {})
+            self.__visit__(
+                path + (name,),
+                submodule,
+                sub_defaults if isinstance(sub_defaults, dict) else {},
+                fields
+            )
+
+    def convert(self, namespace):
+        values = vars(namespace)
+        fields = frozenset(values)
+        cls = self.types.get(fields)
+        if cls is None:
+            # Arguments with a suppressed default may be absent
+            cls = get_class(fields)
+            if cls is None:
+                return namespace
+        result = Result.__new__(cls)
+        for name, value in values.items():
+            setattr(result, name, value)
+        return result
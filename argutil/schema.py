@@ -0,0 +1,187 @@
+##
+#  @package argutil.schema
+#  Definitions file validation against commandline.schema
+
+import json
+import os
+import sys
+import threading
+from . import backend
+from . import cache
+from . import instrument
+
+SCHEMA_FILE = 'commandline.schema'
+MODULE_PREFIX = b'module\0'
+SCHEMA_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    SCHEMA_FILE
+)
+
+_schema = None
+_validator = None
+_module_validator = None
+_valid_fingerprints = set()
+_lock = threading.Lock()
+
+
+def get_schema():
+    global _schema
+    if _schema is None:
+        import hashlib
+        with open(SCHEMA_PATH, 'rb') as f:
+            data = f.read()
+        with _lock:
+            if _schema is None:
+                _schema = (
+                    json.loads(data.decode('utf-8')),
+                    hashlib.sha1(data).hexdigest(),
+                )
+    return _schema
+
+
+def __getattr__(name):
+    if name == 'commandline_schema':
+        return get_schema()[0]
+    if name == 'schema_version':
+        return get_schema()[1]
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name)
+    )
+
+
+if sys.version_info < (3, 7):
+    # Modules have no __getattr__ (PEP 562) before Python 3.7
+    commandline_schema, schema_version = get_schema()
+
+
+def __compile__(schema):
+    import jsonschema
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+def get_validator():
+    global _validator
+    if _validator is None:
+        validator = __compile__(get_schema()[0])
+        with _lock:
+            if _validator is None:
+                _validator = validator
+    return _validator
+
+
+def get_module_validator():
+    global _module_validator
+    if _module_validator is None:
+        definitions = get_schema()[0]['definitions']
+        validator = __compile__(
+            dict(definitions['module'], definitions=definitions)
+        )
+        with _lock:
+            if _module_validator is None:
+                _module_validator = validator
+    return _module_validator
+
+
+def __check__(validator, json_data):
+    import jsonschema
+    error = jsonschema.exceptions.best_match(validator.iter_errors(json_data))
+    if error is not None:
+        raise error
+    return json_data
+
+
+def check(json_data):
+    return __check__(get_validator(), json_data)
+
+
+def check_module(module_data):
+    return __check__(get_module_validator(), module_data)
+
+
+def fingerprint(data):
+    import hashlib
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    sha1 = hashlib.sha1(get_schema()[1].encode('utf-8'))
+    sha1.update(data)
+    return sha1.hexdigest()
+
+
+def __key__(data, module):
+    # A file holding a single module (see argutil.shards) is checked against
+    # a different schema than a whole definitions file with the same bytes
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    return MODULE_PREFIX + data if module else data
+
+
+def get_sidecar_path(json_file, cache_dir):
+    import hashlib
+    key = hashlib.sha1(json_file.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, 'argutil-valid-{}'.format(key[:16]))
+
+
+def is_valid(json_file, data, cache_dir=None, module=False):
+    fp = fingerprint(__key__(data, module))
+    if fp in _valid_fingerprints:
+        return True
+    if cache_dir is None:
+        return False
+    try:
+        with open(get_sidecar_path(json_file, cache_dir), 'r') as f:
+            if f.read().strip() != fp:
+                return False
+    except (IOError, OSError):
+        return False
+    with _lock:
+        _valid_fingerprints.add(fp)
+    return True
+
+
+def mark_valid(json_file, data, cache_dir=None, module=False):
+    fp = fingerprint(__key__(data, module))
+    with _lock:
+        _valid_fingerprints.add(fp)
+    if cache_dir is not None:
+        cache.write_text(get_sidecar_path(json_file, cache_dir), fp)
+
+
+def read_file(json_file, cache_dir=None, module=False):
+    with open(json_file, 'rb') as f:
+        data = f.read()
+    json_data = backend.loads(data)
+    return json_data, is_valid(json_file, data, cache_dir, module)
+
+
+def check_data(json_file, data, json_data, cache_dir=None, module=False):
+    with instrument.stage('validate', file=json_file):
+        if is_valid(json_file, data, cache_dir, module):
+            instrument.count('validate.hit')
+        else:
+            instrument.count('validate.miss')
+            if module:
+                check_module(json_data)
+            else:
+                check(json_data)
+            mark_valid(json_file, data, cache_dir, module)
+        return fingerprint(__key__(data, module))
+
+
+def read_validated(json_file, cache_dir=None, module=False):
+    with instrument.stage('load', file=json_file):
+        with open(json_file, 'rb') as f:
+            data = f.read()
+        json_data = backend.loads(data)
+    return json_data, check_data(
+        json_file,
+        data,
+        json_data,
+        cache_dir,
+        module
+    )
+
+
+def validate_file(json_file, cache_dir=None):
+    return read_validated(json_file, cache_dir)[0]
@@ -0,0 +1,167 @@
+##
+#  @package argutil.shards
+#  Definitions split into one file per module and submodule
+#
+#  A sharded definitions "file" is a directory holding index.json, which
+#  maps module paths ('script', 'script/sub') to shard files relative to the
+#  directory, and one JSON file per shard holding a single module definition.
+
+import json
+import os
+from . import backend
+from . import fileio
+from . import schema
+
+INDEX_FILE = 'index.json'
+SHARD_SUFFIX = '.json'
+SEPARATOR = '/'
+
+
+def is_sharded(definitions_file):
+    return os.path.isdir(definitions_file)
+
+
+def dumps(json_data):
+    return json.dumps(json_data, indent=2)
+
+
+def get_index_path(directory):
+    return os.path.join(directory, INDEX_FILE)
+
+
+def read_index(directory):
+    try:
+        with open(get_index_path(directory), 'rb') as f:
+            return backend.loads(f.read())
+    except (IOError, OSError):
+        return {'modules': {}}
+
+
+def write_index(directory, index):
+    fileio.write_if_changed(get_index_path(directory), dumps(index))
+
+
+def get_shard_name(module_path):
+    return module_path + SHARD_SUFFIX
+
+
+def get_shard_path(directory, shard_name):
+    return os.path.join(directory, *shard_name.split(SEPARATOR))
+
+
+def get_module_paths(index, module):
+    prefix = module + SEPARATOR
+    paths = [
+        path for path in index['modules']
+        if path == module or path.startswith(prefix)
+    ]
+    # Parents before children; siblings keep their index order
+    return sorted(paths, key=lambda path: path.count(SEPARATOR))
+
+
+def get_sources(directory, module):
+    index = read_index(directory)
+    return [get_index_path(directory)] + [
+        get_shard_path(directory, index['modules'][path])
+        for path in get_module_paths(index, module)
+    ]
+
+
+def insert(definition, module_path, shard):
+    names = module_path.split(SEPARATOR)[1:]
+    parent = definition
+    for name in names[:-1]:
+        try:
+            parent = parent['modules'][name]
+        except KeyError:
+            raise KeyError('no parent module for shard ' + module_path)
+    parent.setdefault('modules', {})[names[-1]] = shard
+
+
+def read_module(directory, module, cache_dir=None):
+    index = read_index(directory)
+    definition = None
+    fingerprints = []
+    for path in get_module_paths(index, module):
+        shard, fingerprint = schema.read_validated(
+            get_shard_path(directory, index['modules'][path]),
+            cache_dir,
+            module=True
+        )
+        fingerprints.append('{}={}'.format(path, fingerprint))
+        if definition is None:
+            definition = shard
+        else:
+            insert(definition, path, shard)
+    return definition, ' '.join(fingerprints)
+
+
+def read_file(directory, module, cache_dir=None):
+    index = read_index(directory)
+    if module not in index['modules']:
+        return {'modules': {}}, True
+    shard, valid = schema.read_file(
+        get_shard_path(directory, index['modules'][module]),
+        cache_dir,
+        module=True
+    )
+    return {'modules': {module: shard}}, valid
+
+
+def save(directory, json_data, module):
+    index = read_index(directory)
+    if module in json_data['modules']:
+        if module not in index['modules']:
+            index['modules'][module] = get_shard_name(module)
+        shard_path = get_shard_path(directory, index['modules'][module])
+        text = dumps(json_data['modules'][module])
+        fileio.write_if_changed(shard_path, text)
+        write_index(directory, index)
+        return shard_path, text
+    for path in get_module_paths(index, module):
+        try:
+            os.remove(get_shard_path(directory, index['modules'][path]))
+        except OSError:
+            pass
+        del index['modules'][path]
+    write_index(directory, index)
+    return None, None
+
+
+def validate(directory, cache_dir=None):
+    index = read_index(directory)
+    for shard_name in index['modules'].values():
+        shard_path = get_shard_path(directory, shard_name)
+        with open(shard_path, 'rb') as f:
+            data = f.read()
+        schema.check_module(backend.loads(data))
+        schema.mark_valid(shard_path, data, cache_dir, module=True)
+
+
+def __split_module__(directory, index, path, definition):
+    shard = {k: v for k, v in definition.items() if k != 'modules'}
+    shard_name = get_shard_name(path)
+    shard_path = get_shard_path(directory, shard_name)
+    dirname = os.path.dirname(shard_path)
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    fileio.write_if_changed(shard_path, dumps(shard))
+    index['modules'][path] = shard_name
+    for name, submodule in definition.get('modules', {}).items():
+        __split_module__(
+            directory,
+            index,
+            SEPARATOR.join((path, name)),
+            submodule
+        )
+
+
+def split(definitions_file, directory):
+    json_data = schema.validate_file(definitions_file)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    index = {'modules': {}}
+    for module, definition in json_data['modules'].items():
+        __split_module__(directory, index, module, definition)
+    write_index(directory, index)
+    return directory
@@ -0,0 +1,34 @@
+##
+#  @package argutil.snapshot
+#  Versioned binary snapshots of resolved definitions
+
+import marshal
+import sys
+
+MAGIC = b'ARGUTIL\0'
+SNAPSHOT_VERSION = 1
+
+# marshal's format is only guaranteed stable within one Python version
+HEADER = MAGIC + bytearray([
+    SNAPSHOT_VERSION,
+    sys.version_info[0],
+    sys.version_info[1],
+])
+
+
+def dumps(data):
+    return bytes(HEADER) + marshal.dumps(data)
+
+
+def loads(data):
+    if not data.startswith(bytes(HEADER)):
+        raise ValueError('not a compatible argutil snapshot')
+    return marshal.loads(data[len(HEADER):])
+
+
+def read(filepath):
+    try:
+        with open(filepath, 'rb') as f:
+            return loads(f.read())
+    except (IOError, OSError, ValueError, EOFError, TypeError):
+        return None
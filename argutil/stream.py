@@ -0,0 +1,84 @@
+##
+#  @package argutil.stream
+#  Extraction of a single module from a large definitions file
+#
+#  Only the requested module is decoded. Sibling values are decoded one at
+#  a time to find where they end and are discarded right away, so the rest
+#  of the document is never held in memory as a whole.
+
+import json
+import os
+import re
+from . import instrument
+from . import schema
+
+STREAM_THRESHOLD = 1 << 20
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_decoder = json.JSONDecoder()
+
+
+def should_stream(json_file, stream=None):
+    if stream is None:
+        try:
+            return os.path.getsize(json_file) >= STREAM_THRESHOLD
+        except OSError:
+            return False
+    return bool(stream)
+
+
+def skip_whitespace(text, idx):
+    return WHITESPACE.match(text, idx).end()
+
+
+def expect(text, idx, chars):
+    idx = skip_whitespace(text, idx)
+    if text[idx:idx + 1] not in chars:
+        raise ValueError('expected one of {!r} at char {}'.format(chars, idx))
+    return idx + 1
+
+
+def find_member(text, idx, key):
+    idx = skip_whitespace(text, expect(text, idx, '{'))
+    if text[idx:idx + 1] == '}':
+        return None
+    while True:
+        name, idx = _decoder.raw_decode(text, idx)
+        idx = skip_whitespace(text, expect(text, idx, ':'))
+        if name == key:
+            return idx
+        idx = _decoder.raw_decode(text, idx)[1]
+        idx = skip_whitespace(text, idx)
+        if text[idx:idx + 1] == '}':
+            return None
+        idx = skip_whitespace(text, expect(text, idx, ','))
+
+
+def extract(text, keys):
+    idx = 0
+    for key in keys:
+        idx = find_member(text, idx, key)
+        if idx is None:
+            return None
+    value, end = _decoder.raw_decode(text, idx)
+    return value, text[idx:end]
+
+
+def read_module(json_file, module, cache_dir=None):
+    with instrument.stage('load', file=json_file, module=module):
+        with open(json_file, 'rb') as f:
+            text = f.read().decode('utf-8')
+        found = extract(text, ['modules', module])
+    if found is None:
+        return None, None
+    definition, source = found
+    # Validity is recorded per module, apart from the whole file
+    fingerprint = schema.check_data(
+        '{}#{}'.format(json_file, module),
+        source,
+        definition,
+        cache_dir,
+        module=True
+    )
+    return definition, fingerprint
@@ -2,10 +2,19 @@ import os
 from contextlib import contextmanager
 
 
+def get_directory(path):
+    if not os.path.isdir(path):
+        path = os.path.dirname(os.path.abspath(path))
+    return path
+
+
+def resolve_path(base, path):
+    return os.path.abspath(os.path.join(get_directory(base), path))
+
+
 @contextmanager
 def WorkingDirectory(dir):
-    if not os.path.isdir(dir):
-        dir = os.path.dirname(os.path.abspath(dir))
+    dir = get_directory(dir)
     cwd = os.getcwd()
     if cwd != dir:
         os.chdir(dir)
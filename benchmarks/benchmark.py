@@ -0,0 +1,274 @@
+##
+#  @package benchmarks.benchmark
+#  Import, build and parse benchmarks against synthetic definitions files
+#
+#  Usage:
+#      python benchmarks/benchmark.py -o results.json
+#      python benchmarks/benchmark.py --compare results.json
+
+from __future__ import print_function
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT_NAME = 'bench'
+RESULTS_VERSION = 1
+
+# Run in a fresh interpreter so nothing is cached or already imported.
+# Tracing slows everything down, so peak memory is measured in its own run.
+COLD_SCRIPT = '''
+import json, sys, time, tracemalloc
+sys.path.insert(0, {root!r})
+if {trace!r}:
+    tracemalloc.start()
+start = time.perf_counter()
+import argutil
+imported = time.perf_counter()
+argutil.get_parser({script!r}, lazy={lazy!r})
+built = time.perf_counter()
+print(json.dumps({{
+    'import': imported - start,
+    'get_parser': built - imported,
+    'peak_memory': tracemalloc.get_traced_memory()[1],
+}}))
+'''
+
+
+def module_name(level, index):
+    return 'mod{}_{}'.format(level, index)
+
+
+def generate_module(modules, args, depth, level=1):
+    definition = {
+        'template': 'level{}'.format(level),
+        'examples': [
+            {
+                'usage': '--arg{} value'.format(i),
+                'description': 'example {}'.format(i),
+            }
+            for i in range(min(args, 3))
+        ],
+        'args': [
+            {
+                'short': '-a{}'.format(i),
+                'long': '--arg{}'.format(i),
+                'help': ['argument {} at level {}'.format(i, level)],
+            }
+            for i in range(args)
+        ],
+    }
+    if level < depth:
+        definition['modules'] = {
+            module_name(level + 1, i): generate_module(
+                modules, args, depth, level + 1
+            )
+            for i in range(modules)
+        }
+    return definition
+
+
+def generate_defaults(modules, args, depth, level=1):
+    defaults = {'arg{}'.format(i): 'default{}'.format(i) for i in range(args)}
+    if level < depth:
+        for i in range(modules):
+            defaults[module_name(level + 1, i)] = generate_defaults(
+                modules, args, depth, level + 1
+            )
+    return defaults
+
+
+def generate(directory, modules, args, depth):
+    templates = {}
+    for level in range(1, depth + 1):
+        templates['level{}'.format(level)] = {
+            'args': [{'long': '--tpl{}'.format(level)}],
+            'examples': [
+                {
+                    'usage': '--tpl{}'.format(level),
+                    'description': 'from template level{}'.format(level),
+                }
+            ],
+        }
+        if level > 1:
+            templates['level{}'.format(level)]['parent'] = 'level{}'.format(
+                level - 1
+            )
+    root = {
+        'templates': templates,
+        'args': [{'long': '--verbose', 'action': 'store_true'}],
+        'modules': {
+            module_name(1, i): generate_module(modules, args, depth)
+            for i in range(modules)
+        },
+    }
+    defaults = {
+        module_name(1, i): generate_defaults(modules, args, depth)
+        for i in range(modules)
+    }
+    with open(os.path.join(directory, 'commandline.json'), 'w') as f:
+        json.dump({'modules': {SCRIPT_NAME: root}}, f)
+    with open(os.path.join(directory, 'defaults.json'), 'w') as f:
+        json.dump({SCRIPT_NAME: defaults}, f)
+    script = os.path.join(directory, SCRIPT_NAME + '.py')
+    open(script, 'w').close()
+    return script
+
+
+def deepest_path(depth):
+    return [module_name(level, 0) for level in range(1, depth + 1)]
+
+
+def best_of(function, repeat, number):
+    return min(timeit.repeat(function, repeat=repeat, number=number)) / number
+
+
+def run_script(script, lazy, trace):
+    code = COLD_SCRIPT.format(
+        root=ROOT, script=script, lazy=lazy, trace=trace
+    )
+    output = subprocess.check_output(
+        [sys.executable, '-c', code],
+        cwd=os.path.dirname(script),
+        universal_newlines=True,
+    )
+    return json.loads(output)
+
+
+def run_cold(script, lazy, repeat):
+    runs = [run_script(script, lazy, False) for _ in range(repeat)]
+    results = {
+        key: min(run[key] for run in runs)
+        for key in ['import', 'get_parser']
+    }
+    results['peak_memory'] = run_script(script, lazy, True)['peak_memory']
+    return results
+
+
+def run_help(parser, argv):
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            parser.parse_args(argv + ['-h'])
+        except SystemExit:
+            pass
+
+
+def run(modules, args, depth, repeat, number):
+    sys.path.insert(0, ROOT)
+    import argutil
+
+    directory = tempfile.mkdtemp()
+    try:
+        script = generate(directory, modules, args, depth)
+        cold = run_cold(script, False, repeat)
+        cold_lazy = run_cold(script, True, repeat)
+
+        argutil.get_parser(script)
+        parser = argutil.get_parser(script)
+        path = deepest_path(depth)
+        argv = path + ['--arg0', 'value', '--tpl{}'.format(depth), 'x']
+
+        results = {
+            'import': cold['import'],
+            'get_parser_cold': cold['get_parser'],
+            'get_parser_cold_lazy': cold_lazy['get_parser'],
+            'peak_memory': cold['peak_memory'],
+            'peak_memory_lazy': cold_lazy['peak_memory'],
+            'get_parser_warm': best_of(
+                lambda: argutil.get_parser(script), repeat, number
+            ),
+            'get_parser_warm_lazy': best_of(
+                lambda: argutil.get_parser(script, lazy=True), repeat, number
+            ),
+            'help_root': best_of(
+                lambda: run_help(parser, []), repeat, number
+            ),
+            'help_leaf': best_of(
+                lambda: run_help(parser, path), repeat, number
+            ),
+            'parse_args': best_of(
+                lambda: parser.parse_args(argv), repeat, number
+            ),
+            'parse_args_lazy': best_of(
+                lambda: argutil.get_parser(script, lazy=True).parse_args(argv),
+                repeat,
+                number
+            ),
+        }
+    finally:
+        shutil.rmtree(directory)
+    return results
+
+
+def compare(previous, current):
+    print('{:<24}{:>14}{:>14}{:>10}'.format(
+        'benchmark', 'previous', 'current', 'ratio'
+    ))
+    for key, value in sorted(current.items()):
+        if key not in previous:
+            continue
+        ratio = value / previous[key] if previous[key] else float('inf')
+        print('{:<24}{:>14.6g}{:>14.6g}{:>9.2f}x'.format(
+            key, previous[key], value, ratio
+        ))
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        description='benchmark argutil against synthetic definitions'
+    )
+    parser.add_argument('-n', '--modules', type=int, default=5,
+                        help='submodules per module')
+    parser.add_argument('-m', '--args', type=int, default=10,
+                        help='arguments per module')
+    parser.add_argument('-d', '--depth', type=int, default=3,
+                        help='depth of nested submodules')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='repetitions; the best is reported')
+    parser.add_argument('--number', type=int, default=20,
+                        help='calls per repetition of in-process benchmarks')
+    parser.add_argument('-o', '--output',
+                        help='write results as JSON to this file')
+    parser.add_argument('-c', '--compare',
+                        help='compare against results from a previous run')
+    return parser
+
+
+def main(argv=None):
+    opts = get_parser().parse_args(argv)
+    results = run(
+        opts.modules, opts.args, opts.depth, opts.repeat, opts.number
+    )
+    report = {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'params': {
+            'modules': opts.modules,
+            'args': opts.args,
+            'depth': opts.depth,
+        },
+        'results': results,
+    }
+    if opts.compare:
+        with open(opts.compare) as f:
+            previous = json.load(f)
+        if previous.get('params') != report['params']:
+            print('warning: parameters differ from {}'.format(opts.compare))
+        compare(previous['results'], results)
+    else:
+        print(json.dumps(report, indent=4, sort_keys=True))
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            json.dump(report, f, indent=4, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
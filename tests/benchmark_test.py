@@ -0,0 +1,33 @@
+import unittest
+from .helper import tempdir, record_stdout
+import os
+import sys
+import argutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__
+))))
+from benchmarks import benchmark
+
+
+class BenchmarkTest(unittest.TestCase):
+    @tempdir()
+    def test_generated_definitions(self):
+        script = benchmark.generate(os.getcwd(), 2, 3, 3)
+        parser = argutil.get_parser(script)
+        opts = parser.parse_args(benchmark.deepest_path(3) + ['--tpl1', 'x'])
+        self.assertEqual(opts.tpl1, 'x')
+        self.assertEqual(opts.arg2, 'default2')
+
+    def test_compare(self):
+        buf = []
+        with record_stdout(buf):
+            benchmark.compare(
+                {'a': 1.0, 'b': 0},
+                {'a': 2.0, 'b': 1.0, 'c': 1.0}
+            )
+        lines = ''.join(buf).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('a'))
+        self.assertTrue(lines[1].endswith('2.00x'))
+        self.assertTrue(lines[2].endswith('infx'))
@@ -0,0 +1,113 @@
+import unittest
+from .helper import tempdir, write_definitions, SUBCOMMANDS, \
+    SUBCOMMANDS_DEFAULTS
+import os
+import sys
+from argparse import Namespace
+from argutil import ParserDefinition, bulk
+
+
+class BulkTest(unittest.TestCase):
+    def create(self):
+        write_definitions(SUBCOMMANDS, SUBCOMMANDS_DEFAULTS)
+        return ParserDefinition('test_script.py')
+
+    @tempdir()
+    def test_parse_all(self):
+        parser_def = self.create()
+        results = list(parser_def.parse_all([
+            ['run', '--count', '3'],
+            '--name "a b" show',
+        ]))
+        self.assertEqual(
+            [(opts.command, opts.name) for opts in results],
+            [('run', 'default'), ('show', 'a b')]
+        )
+        self.assertEqual(results[0].count, 3)
+
+    @tempdir()
+    def test_errors_do_not_exit(self):
+        parser_def = self.create()
+        results = list(parser_def.parse_all([
+            ['run', '--count', 'x'],
+            ['--help'],
+            'show "unclosed',
+            ['show'],
+        ]))
+        self.assertEqual(
+            [type(result) for result in results],
+            [bulk.ArgvError] * 3 + [Namespace]
+        )
+        error, usage, unclosed = results[:3]
+        self.assertEqual((error.index, error.status), (0, 2))
+        self.assertEqual(error.argv, ['run', '--count', 'x'])
+        self.assertIn("invalid int value: 'x'", error.message)
+        self.assertEqual(usage.status, 0)
+        self.assertIn('usage: test_script', usage.message)
+        self.assertEqual((unclosed.index, unclosed.status), (2, None))
+
+    @tempdir()
+    def test_other_output_not_captured(self):
+        parser_def = self.create()
+        parser_def.add_argument('--echo', type='echo')
+        stdout = sys.stdout
+        echoed = []
+
+        def echo(value):
+            echoed.append(sys.stdout is stdout)
+            return value
+        for lazy in [False, True]:
+            error = list(parser_def.parse_all(
+                [['--echo', 'hi', 'run', '--count', 'x']],
+                env={'echo': echo},
+                lazy=lazy
+            ))[0]
+            self.assertIn("invalid int value: 'x'", error.message)
+        self.assertEqual(echoed, [True, True])
+        self.assertIs(sys.stdout, stdout)
+
+    @tempdir()
+    def test_lazy_results(self):
+        parser_def = self.create()
+        consumed = []
+
+        def argvs():
+            for i in range(3):
+                consumed.append(i)
+                yield ['show']
+        results = parser_def.parse_all(argvs())
+        next(results)
+        self.assertEqual(consumed, [0])
+
+    @tempdir()
+    def test_manifest(self):
+        parser_def = self.create()
+        with open('manifest.txt', 'w') as f:
+            f.write('# jobs\nrun --count 1\n\n["--name", "x", "show"]\n')
+        results = list(parser_def.parse_all('manifest.txt'))
+        self.assertEqual(
+            [opts.command for opts in results],
+            ['run', 'show']
+        )
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    @tempdir()
+    def test_process_pool(self):
+        parser_def = self.create()
+        calls = []
+        parser_def.env['run'] = calls.append
+        argvs = [['run', '--count', str(i)] for i in range(50)]
+        argvs.insert(10, ['run', '--count', 'x'])
+        results = list(parser_def.parse_all(argvs, processes=2, chunksize=4))
+        self.assertEqual(len(results), 51)
+        self.assertIsInstance(results[10], bulk.ArgvError)
+        self.assertEqual(results[10].index, 10)
+        del results[10]
+        self.assertEqual(
+            [opts.count for opts in results],
+            list(range(50))
+        )
+        results[0].func(results[0])
+        self.assertEqual(calls, [results[0]])
+        show = list(parser_def.parse_all([['show']], processes=2))[0]
+        self.assertTrue(callable(show.func))
@@ -0,0 +1,90 @@
+import unittest
+from .helper import tempdir
+import os
+from argutil import ParserDefinition, cache, schema
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.environ = dict(os.environ)
+        os.environ.pop(cache.CACHE_ENV_VAR, None)
+        os.environ.pop(cache.CACHE_DIR_ENV_VAR, None)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+
+    def create(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        parser_def.add_argument('--foo')
+        parser_def.set_defaults(foo='bar')
+        return parser_def
+
+    def cache_entries(self):
+        if not os.path.isdir(cache.PYCACHE_DIR):
+            return []
+        return [
+            f for f in os.listdir(cache.PYCACHE_DIR)
+            if f.startswith('argutil-')
+        ]
+
+    @tempdir()
+    def test_cache_disabled_by_default(self):
+        self.create().get_parser()
+        self.assertEqual(self.cache_entries(), [])
+
+    @tempdir()
+    def test_cache_entry_written(self):
+        self.create()
+        ParserDefinition('test_script.py', cache=True).get_parser()
+        self.assertEqual(len(self.cache_entries()), 1)
+
+    @tempdir()
+    def test_cache_enabled_by_environment(self):
+        self.create()
+        os.environ[cache.CACHE_ENV_VAR] = '1'
+        ParserDefinition('test_script.py').get_parser()
+        self.assertEqual(len(self.cache_entries()), 1)
+
+    @tempdir()
+    def test_cache_dir_from_environment(self):
+        self.create()
+        os.environ[cache.CACHE_DIR_ENV_VAR] = os.path.abspath('cachedir')
+        ParserDefinition('test_script.py', cache=True).get_parser()
+        self.assertEqual(len(os.listdir('cachedir')), 1)
+
+    @tempdir()
+    def test_warm_start_skips_validation(self):
+        self.create()
+        ParserDefinition('test_script.py', cache=True).get_parser()
+        with mock.patch.object(schema, 'read_validated') as read_validated:
+            parser = ParserDefinition(
+                'test_script.py', cache=True
+            ).get_parser()
+            self.assertFalse(read_validated.called)
+        self.assertEqual(parser.parse_args([]).foo, 'bar')
+
+    @tempdir()
+    def test_definitions_change_invalidates_cache(self):
+        parser_def = self.create()
+        ParserDefinition('test_script.py', cache=True).get_parser()
+        parser_def.add_argument('--bar')
+        parser = ParserDefinition('test_script.py', cache=True).get_parser()
+        self.assertEqual(parser.parse_args(['--bar', 'x']).bar, 'x')
+
+    @tempdir()
+    def test_defaults_change_invalidates_cache(self):
+        parser_def = self.create()
+        ParserDefinition('test_script.py', cache=True).get_parser()
+        parser_def.set_defaults(foo='baz')
+        parser = ParserDefinition('test_script.py', cache=True).get_parser()
+        self.assertEqual(parser.parse_args([]).foo, 'baz')
+
+
+if __name__ == '__main__':
+    unittest.main()
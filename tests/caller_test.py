@@ -0,0 +1,54 @@
+import unittest
+import os
+import sys
+import types
+import argutil
+from argutil import ParserDefinition
+from argutil.argutil import get_file
+
+THIS_FILE = os.path.abspath(__file__)
+
+
+def call_get_file():
+    return get_file(__stackdepth__=2)
+
+
+class CallerTest(unittest.TestCase):
+    def test_get_file(self):
+        self.assertEqual(os.path.abspath(get_file()), THIS_FILE)
+
+    def test_get_file_stackdepth(self):
+        self.assertEqual(os.path.abspath(call_get_file()), THIS_FILE)
+
+    def test_parser_definition_detects_caller(self):
+        parser_def = ParserDefinition()
+        self.assertEqual(parser_def.filepath, THIS_FILE)
+        self.assertEqual(parser_def.module, 'caller_test')
+
+    def test_from_module(self):
+        parser_def = ParserDefinition.from_module(sys.modules[__name__])
+        self.assertEqual(parser_def.filepath, THIS_FILE)
+        self.assertEqual(parser_def.module, 'caller_test')
+
+    def test_from_module_name(self):
+        parser_def = ParserDefinition.from_module(__name__, env={'a': 1})
+        self.assertEqual(parser_def.module, 'caller_test')
+        self.assertEqual(parser_def.env, {'a': 1})
+
+    def test_from_module_without_file(self):
+        with self.assertRaises(ValueError):
+            ParserDefinition.from_module(types.ModuleType('no_file'))
+
+    def test_definitions_relative_to_module(self):
+        parser_def = ParserDefinition.from_module(__name__)
+        self.assertEqual(
+            parser_def.definitions_file,
+            os.path.join(
+                os.path.dirname(THIS_FILE),
+                argutil.defaults.DEFINITIONS_FILE
+            )
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
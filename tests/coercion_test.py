@@ -0,0 +1,117 @@
+import unittest
+from .helper import tempdir, write_definitions
+from argutil import ParserDefinition, coercion
+
+DEFINITIONS = {
+    'args': [
+        {'long': '--count', 'type': 'int'},
+        {'long': '--ratio', 'type': 'float'},
+        {'long': '--name'},
+        {'long': '--verbose', 'action': 'store_true'},
+        {'long': '--ids', 'type': 'int', 'nargs': '+'},
+        {'long': '--color', 'choices': ['red', 'blue']},
+    ],
+    'modules': {
+        'run': {'args': [{'long': '--jobs', 'type': 'int'}]},
+    },
+}
+
+
+class CoercionTest(unittest.TestCase):
+    def create(self):
+        write_definitions(DEFINITIONS)
+        return ParserDefinition('test_script.py')
+
+    @tempdir()
+    def test_defaults_coerced_once(self):
+        parser_def = self.create()
+        parser_def.set_defaults(**{
+            'count': '5',
+            'verbose': 'false',
+            'ids': ['1', '2'],
+            'name': '{greeting}',
+            'run.jobs': '4',
+            'extra': '7',
+        })
+        module_defaults = parser_def.__get_resolved__()[1]
+        self.assertEqual(module_defaults['count'], 5)
+        self.assertIs(module_defaults['verbose'], False)
+        self.assertEqual(module_defaults['ids'], [1, 2])
+        self.assertEqual(module_defaults['run'], {'jobs': 4})
+        self.assertEqual(module_defaults['extra'], '7')
+        parser_def.env['greeting'] = 'hi'
+        opts = parser_def.get_parser().parse_args(['run'])
+        self.assertEqual(
+            (opts.count, opts.verbose, opts.name, opts.jobs),
+            (5, False, 'hi', 4)
+        )
+
+    @tempdir()
+    def test_invalid_default_left_as_is(self):
+        parser_def = self.create()
+        parser_def.set_defaults(count='many', color='green')
+        module_defaults = parser_def.__get_resolved__()[1]
+        self.assertEqual(module_defaults['count'], 'many')
+        self.assertEqual(module_defaults['color'], 'green')
+
+    @tempdir()
+    def test_config_uses_declared_types(self):
+        parser_def = self.create()
+        parser_def.config([
+            'count=7',
+            'ratio=1',
+            'name=5',
+            "verbose='yes'",
+            'ids=[1, 2, 3]',
+            'color=red',
+            'run.jobs=2',
+            'other=true',
+        ])
+        self.assertEqual(parser_def.get_defaults(), {
+            'count': 7,
+            'ratio': 1.0,
+            'name': '5',
+            'verbose': True,
+            'ids': [1, 2, 3],
+            'color': 'red',
+            'run': {'jobs': 2},
+            'other': True,
+        })
+
+    @tempdir()
+    def test_config_rejects_invalid_values(self):
+        parser_def = self.create()
+        with self.assertRaises(ValueError):
+            parser_def.config(['count=x'])
+        with self.assertRaises(ValueError):
+            parser_def.config(['color=green'])
+        with self.assertRaises(ValueError):
+            parser_def.config(['verbose=maybe'])
+        self.assertEqual(parser_def.get_defaults(), {})
+
+    @tempdir()
+    def test_config_without_definitions(self):
+        parser_def = ParserDefinition('test_script.py')
+        parser_def.config(['count=7', 'ids=[1, 2]', 'name=x'])
+        self.assertEqual(parser_def.get_defaults(), {
+            'count': 7,
+            'ids': [1, 2],
+            'name': 'x',
+        })
+        write_definitions(DEFINITIONS, module='other_script')
+        parser_def.config(['count=8'])
+        self.assertEqual(parser_def.get_defaults()['count'], 8)
+
+    def test_plan(self):
+        plan = coercion.CoercionPlan({
+            'args': [
+                {'long': '-v', 'action': 'count'},
+                {'long': '--help-me', 'action': 'help'},
+                {'long': '--pair', 'nargs': '2'},
+            ],
+        })
+        self.assertEqual(sorted(plan.fields), ['pair', 'v'])
+        self.assertEqual(plan.get('v').parse('3'), 3)
+        self.assertEqual(plan.get('pair').parse('a, b'), ['a', 'b'])
+        self.assertIsNone(plan.get('missing.v'))
+        self.assertEqual(plan.get('pair').coerce('{x}'), '{x}')
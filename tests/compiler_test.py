@@ -0,0 +1,128 @@
+import unittest
+from .helper import tempdir, write_definitions
+import os
+from argutil import ParserDefinition, cli, compiler
+
+
+class CompilerTest(unittest.TestCase):
+    def create(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        with parser_def.transaction():
+            parser_def.add_argument('--foo', help='foo in {unit}')
+            parser_def.add_argument('--num', type='int')
+            parser_def.add_argument('--hex', type='to_hex')
+            parser_def.add_argument('--hidden', help=None)
+            parser_def.add_example('--foo bar', 'set foo')
+            parser_def.set_defaults(foo='{unit}s')
+        parser_def.env.update(unit='meter', to_hex=lambda s: hex(int(s)))
+        return parser_def
+
+    def assertSameParser(self, parser1, parser2, *argv):
+        self.assertEqual(parser1.format_help(), parser2.format_help())
+        opts1 = vars(parser1.parse_args(list(argv)))
+        opts2 = vars(parser2.parse_args(list(argv)))
+        # usage handlers are per-parser closures
+        opts1.pop('func', None)
+        opts2.pop('func', None)
+        self.assertEqual(opts1, opts2)
+
+    @tempdir()
+    def test_compile(self):
+        parser_def = self.create()
+        parser = parser_def.get_parser()
+        compiled_file = parser_def.compile()
+        self.assertEqual(
+            compiled_file,
+            os.path.abspath('test_script_parser.py')
+        )
+        self.assertIsNotNone(compiler.load(compiled_file, 'test_script'))
+        compiled = parser_def.get_parser()
+        self.assertSameParser(parser, compiled, '--num', '1', '--hex', '10')
+        self.assertEqual(compiled.parse_args([]).foo, 'meters')
+
+    @tempdir()
+    def test_stale_compiled_module_ignored(self):
+        parser_def = self.create()
+        compiled_file = parser_def.compile()
+        parser_def.add_argument('--bar')
+        self.assertIsNone(compiler.load(compiled_file, 'test_script'))
+        opts = parser_def.get_parser().parse_args(['--bar', 'baz'])
+        self.assertEqual(opts.bar, 'baz')
+
+    @tempdir()
+    def test_compiled_module_for_other_script_ignored(self):
+        parser_def = self.create()
+        compiled_file = parser_def.compile()
+        self.assertIsNone(compiler.load(compiled_file, 'other_script'))
+
+    @tempdir()
+    def test_hand_written_module_not_imported(self):
+        parser_def = self.create()
+        with open('test_script_parser.py', 'w') as f:
+            f.write('raise RuntimeError("hand-written module executed")\n')
+        self.assertIsNone(compiler.load(
+            parser_def.compiled_file,
+            'test_script'
+        ))
+        self.assertEqual(parser_def.get_parser().parse_args([]).num, None)
+        with self.assertRaises(ValueError):
+            parser_def.compile()
+        with open('test_script_parser.py') as f:
+            self.assertIn('hand-written', f.read())
+
+    @tempdir()
+    def test_non_finite_floats(self):
+        write_definitions({
+            'args': [
+                {'long': '--limit', 'type': 'float'},
+                {'long': '--ratios', 'type': 'float', 'nargs': '+'},
+            ],
+        }, {'limit': 'inf', 'ratios': ['-inf', 'nan']})
+        parser_def = ParserDefinition('test_script.py')
+        compiled_file = parser_def.compile()
+        self.assertIsNotNone(compiler.load(compiled_file, 'test_script'))
+        opts = parser_def.get_parser().parse_args([])
+        self.assertEqual(opts.limit, float('inf'))
+        self.assertEqual(opts.ratios[0], float('-inf'))
+        self.assertNotEqual(opts.ratios[1], opts.ratios[1])
+
+    def test_verify(self):
+        with self.assertRaises(ValueError):
+            compiler.verify('def build(env, lazy=False):\n    return x\n')
+
+    @tempdir()
+    def test_submodules(self):
+        write_definitions({
+            'modules': {
+                'sub': {
+                    'aliases': ['s'],
+                    'help': 'a submodule',
+                    'args': [{'long': '--foo'}],
+                    'examples': [{'usage': '--foo', 'description': 'x'}],
+                },
+            },
+        }, {'sub': {'foo': 'bar'}})
+        parser_def = ParserDefinition('test_script.py')
+        parser = parser_def.get_parser()
+        parser_def.compile()
+        for lazy in [False, True]:
+            compiled = parser_def.get_parser(lazy=lazy)
+            self.assertSameParser(parser, compiled, 's')
+            self.assertEqual(compiled.parse_args(['sub']).foo, 'bar')
+
+    @tempdir()
+    def test_main(self):
+        self.create()
+        self.assertEqual(
+            cli.main(['compile', 'test_script.py', '-o', 'out.py']),
+            0
+        )
+        self.assertTrue(os.path.isfile('out.py'))
+        parser_def = ParserDefinition(
+            'test_script.py',
+            compiled_file='out.py'
+        )
+        self.assertIsNotNone(compiler.load(
+            parser_def.compiled_file,
+            'test_script'
+        ))
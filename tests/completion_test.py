@@ -0,0 +1,124 @@
+import unittest
+from .helper import tempdir, record_stdout
+import json
+import os
+from argutil import ParserDefinition, cli, completion
+
+DEFINITIONS = {
+    'modules': {
+        'test_script': {
+            'templates': {
+                'base': {
+                    'args': [
+                        {'long': '--verbose', 'short': '-v',
+                         'action': 'store_true'},
+                    ],
+                },
+            },
+            'args': [
+                {'long': '--config', 'short': '-c'},
+                {'long': '--color', 'choices': ['auto', 'always', 'never']},
+            ],
+            'modules': {
+                'remote': {
+                    'template': 'base',
+                    'aliases': ['rm'],
+                    'args': [{'long': 'action', 'choices': ['add', 'show']}],
+                    'modules': {'prune': {'args': [{'long': '--dry-run'}]}},
+                },
+                'status': {'args': []},
+            },
+        },
+    },
+}
+
+
+class CompletionTest(unittest.TestCase):
+    def create(self):
+        with open('commandline.json', 'w') as f:
+            json.dump(DEFINITIONS, f)
+        parser_def = ParserDefinition('test_script.py')
+        return completion.read(parser_def.completion())
+
+    def complete(self, index, *words):
+        return completion.complete(index, words)
+
+    @tempdir()
+    def test_commands(self):
+        index = self.create()
+        self.assertEqual(self.complete(index, ''), ['remote', 'rm', 'status'])
+        self.assertEqual(self.complete(index, 'r'), ['remote', 'rm'])
+        self.assertEqual(
+            self.complete(index, 'rm', ''),
+            ['add', 'prune', 'show']
+        )
+
+    @tempdir()
+    def test_options(self):
+        index = self.create()
+        self.assertEqual(
+            self.complete(index, '--c'),
+            ['--color', '--config']
+        )
+        self.assertEqual(
+            self.complete(index, 'remote', '-'),
+            ['--help', '--verbose', '-h', '-v']
+        )
+        self.assertEqual(
+            self.complete(index, 'remote', 'prune', '--'),
+            ['--dry-run', '--help']
+        )
+
+    @tempdir()
+    def test_option_values(self):
+        index = self.create()
+        self.assertEqual(
+            self.complete(index, '--color', 'a'),
+            ['always', 'auto']
+        )
+        self.assertEqual(self.complete(index, '-c', ''), [])
+        self.assertEqual(
+            self.complete(index, '-c', 'status', ''),
+            ['remote', 'rm', 'status']
+        )
+        self.assertEqual(
+            self.complete(index, '--config=x', 'status', '-'),
+            ['--help', '-h']
+        )
+
+    @tempdir()
+    def test_stale_index_rebuilt(self):
+        self.create()
+        parser_def = ParserDefinition('test_script.py')
+        parser_def.add_argument('--new')
+        index = completion.load(os.path.abspath('test_script_completion.json'))
+        self.assertIn('--new', self.complete(index, '--n'))
+
+    def test_command_quoted(self):
+        self.assertEqual(
+            completion.get_command('/opt/my python', '/tmp/sp ace/t.json'),
+            "'/opt/my python' -m argutil complete '/tmp/sp ace/t.json'"
+        )
+
+    @tempdir()
+    def test_cli(self):
+        self.create()
+        buf = []
+        with record_stdout(buf):
+            cli.main(['completion', 'test_script.py', '--prog', 'ts'])
+        shim = ''.join(buf)
+        self.assertIn('complete -o default -F _argutil_complete_ts ts', shim)
+        self.assertIn('test_script_completion.json', shim)
+        buf = []
+        with record_stdout(buf):
+            cli.main([
+                'complete',
+                'test_script_completion.json',
+                'remote',
+                '--v'
+            ])
+        self.assertEqual(''.join(buf), '--verbose\n')
+        buf = []
+        with record_stdout(buf):
+            cli.main(['completion', 'test_script.py', '-s', 'zsh'])
+        self.assertIn('#compdef test_script.py', ''.join(buf))
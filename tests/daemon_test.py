@@ -0,0 +1,154 @@
+import unittest
+from .helper import tempdir, record_stdout, write_definitions, \
+    SUBCOMMANDS, SUBCOMMANDS_DEFAULTS
+import os
+import tempfile
+import threading
+import argutil
+from argutil import ParserDefinition, daemon
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'requires Unix sockets')
+class DaemonTest(unittest.TestCase):
+    def setUp(self):
+        self.socket_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.socket_dir, 'argutil.sock')
+        self.server = daemon.get_server_class()(self.socket_path)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever,
+            kwargs={'poll_interval': 0.01}
+        )
+        self.thread.start()
+        self.environ = mock.patch.dict(
+            os.environ,
+            {daemon.DAEMON_ENV_VAR: self.socket_path}
+        )
+        self.environ.start()
+
+    def tearDown(self):
+        self.environ.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        os.remove(self.socket_path)
+        os.rmdir(self.socket_dir)
+
+    def create(self):
+        write_definitions(SUBCOMMANDS, SUBCOMMANDS_DEFAULTS)
+        return ParserDefinition('test_script.py')
+
+    def served(self, parser_def):
+        return daemon.Entry(parser_def).parser is not None
+
+    @tempdir()
+    def test_parse_in_daemon(self):
+        parser_def = self.create()
+        with mock.patch.object(
+            ParserDefinition, 'get_parser', side_effect=AssertionError
+        ):
+            opts = parser_def.parse_args(['run', '--count', '3'])
+        self.assertEqual((opts.name, opts.count), ('default', 3))
+        self.assertEqual(len(self.server.daemon.entries), 1)
+
+    @tempdir()
+    def test_dispatch(self):
+        parser_def = self.create()
+        calls = []
+        parser_def.env['run'] = calls.append
+        opts = parser_def.parse_args(['run'])
+        opts.func(opts)
+        self.assertEqual(calls, [opts])
+        buf = []
+        opts = parser_def.parse_args(['show'])
+        with record_stdout(buf):
+            self.assertEqual(opts.func(), 0)
+        self.assertIn('usage: show', ''.join(buf))
+
+    @tempdir()
+    def test_exit(self):
+        parser_def = self.create()
+        buf = []
+        with record_stdout(buf):
+            with self.assertRaises(SystemExit) as e:
+                parser_def.parse_args(['-h'])
+        self.assertEqual(e.exception.code, 0)
+        self.assertIn('usage: test_script', ''.join(buf))
+
+    @tempdir()
+    def test_fallback_for_env_types(self):
+        parser_def = self.create()
+        parser_def.add_argument('--hex', type='to_hex')
+        parser_def.env['to_hex'] = lambda s: hex(int(s))
+        opts = parser_def.parse_args(['--hex', '10'])
+        self.assertEqual(opts.hex, '0xa')
+        self.assertFalse(self.served(parser_def))
+
+    @tempdir()
+    def test_definitions_change(self):
+        parser_def = self.create()
+        parser_def.parse_args([])
+        parser_def.add_argument('--new')
+        self.assertEqual(parser_def.parse_args(['--new', 'x']).new, 'x')
+
+    @tempdir()
+    def test_fallback_for_other_context(self):
+        parser_def = self.create()
+        get_context = daemon.get_context
+        for name, value in [
+            ('prefix', '/other/prefix'),
+            ('environ', {daemon.cache.CACHE_ENV_VAR: '1'}),
+            ('plugins', 'other-plugins'),
+        ]:
+            def other_context(parser_def):
+                context = get_context(parser_def)
+                context[name] = value
+                return context
+            with mock.patch.object(daemon, 'get_context', other_context):
+                opts = parser_def.parse_args(['run'])
+            self.assertEqual(opts.name, 'default')
+            self.assertEqual(len(self.server.daemon.entries), 0)
+
+    @tempdir()
+    def test_untrusted_socket_not_used(self):
+        parser_def = self.create()
+        for path, mode in [
+            (self.socket_path, 0o666),
+            (self.socket_dir, 0o777),
+        ]:
+            os.chmod(path, mode)
+            self.assertFalse(daemon.is_trusted(self.socket_path))
+            opts = parser_def.parse_args(['run'])
+            self.assertEqual(opts.name, 'default')
+            self.assertEqual(len(self.server.daemon.entries), 0)
+            os.chmod(path, 0o700)
+        self.assertTrue(daemon.is_trusted(self.socket_path))
+
+    def test_default_socket_in_private_dir(self):
+        with mock.patch.dict(os.environ, {
+            daemon.DAEMON_ENV_VAR: '1',
+            'XDG_RUNTIME_DIR': self.socket_dir,
+        }):
+            socket_path = daemon.get_socket_path()
+        self.assertEqual(
+            os.path.dirname(os.path.dirname(socket_path)),
+            self.socket_dir
+        )
+        daemon.make_socket_dir(socket_path)
+        socket_dir = os.path.dirname(socket_path)
+        self.assertEqual(os.stat(socket_dir).st_mode & 0o777, 0o700)
+        os.rmdir(socket_dir)
+
+    @tempdir()
+    def test_daemon_absent(self):
+        self.create()
+        with mock.patch.dict(
+            os.environ,
+            {daemon.DAEMON_ENV_VAR: os.path.abspath('missing.sock')}
+        ):
+            opts = argutil.parse_args('test_script.py', ['run'])
+        self.assertEqual(opts.name, 'default')
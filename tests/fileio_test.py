@@ -0,0 +1,124 @@
+import unittest
+from .helper import tempdir
+import multiprocessing
+import os
+import stat
+import threading
+import time
+from argutil import ParserDefinition, fileio
+
+
+def set_defaults_worker(index):
+    ParserDefinition('test_script.py').set_defaults(
+        **{'key{}'.format(index): index}
+    )
+
+
+class FileIOTest(unittest.TestCase):
+    def read(self, filepath):
+        with open(filepath) as f:
+            return f.read()
+
+    @tempdir()
+    def test_write_atomic(self):
+        fileio.write_atomic('file.json', 'first')
+        fileio.write_atomic('file.json', 'second')
+        self.assertEqual(self.read('file.json'), 'second')
+        self.assertEqual(os.listdir('.'), ['file.json'])
+
+    @tempdir()
+    def test_write_atomic_preserves_mode(self):
+        fileio.write_atomic('file.json', 'first')
+        os.chmod('file.json', 0o640)
+        fileio.write_atomic('file.json', 'second')
+        self.assertEqual(stat.S_IMODE(os.stat('file.json').st_mode), 0o640)
+
+    @tempdir()
+    def test_write_if_changed_skips_unchanged(self):
+        self.assertTrue(fileio.write_if_changed('file.json', 'content'))
+        os.utime('file.json', (0, 0))
+        self.assertFalse(fileio.write_if_changed('file.json', 'content'))
+        self.assertEqual(os.stat('file.json').st_mtime, 0)
+        self.assertTrue(fileio.write_if_changed('file.json', 'changed'))
+
+    @tempdir()
+    def test_unchanged_defaults_not_rewritten(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        parser_def.set_defaults(foo='bar')
+        os.utime(parser_def.defaults_file, (0, 0))
+        parser_def.set_defaults(foo='bar')
+        self.assertEqual(os.stat(parser_def.defaults_file).st_mtime, 0)
+
+    @tempdir()
+    def test_lock_is_reentrant(self):
+        with fileio.locked('file.json'):
+            with fileio.locked('file.json', 'other.json'):
+                pass
+        self.assertEqual(fileio.get_lock('file.json').depth, 0)
+
+    @tempdir()
+    def test_no_lock_files_next_to_definitions(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        parser_def.add_argument('--foo')
+        parser_def.set_defaults(foo='bar')
+        self.assertEqual(
+            sorted(os.listdir('.')),
+            ['commandline.json', 'defaults.json', 'test_script.py']
+        )
+        lock_path = fileio.get_lock_path('commandline.json')
+        self.assertEqual(
+            os.path.dirname(os.path.dirname(lock_path)),
+            fileio.get_runtime_dir()
+        )
+        self.assertTrue(os.path.isfile(lock_path))
+
+    @tempdir()
+    def test_lock_blocks_other_threads(self):
+        events = []
+
+        def worker():
+            with fileio.locked('file.json'):
+                events.append('worker')
+
+        with fileio.locked('file.json'):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            time.sleep(0.05)
+            events.append('main')
+        thread.join()
+        self.assertEqual(events, ['main', 'worker'])
+
+    @tempdir()
+    def test_concurrent_set_defaults_threads(self):
+        ParserDefinition.create('test_script.py')
+        threads = [
+            threading.Thread(target=set_defaults_worker, args=(i,))
+            for i in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        defaults = ParserDefinition('test_script.py').get_defaults()
+        self.assertEqual(len(defaults), 10)
+
+    @tempdir()
+    def test_concurrent_set_defaults_processes(self):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.skipTest('requires fork start method')
+        ParserDefinition.create('test_script.py')
+        ctx = multiprocessing.get_context('fork')
+        processes = [
+            ctx.Process(target=set_defaults_worker, args=(i,))
+            for i in range(10)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        defaults = ParserDefinition('test_script.py').get_defaults()
+        self.assertEqual(len(defaults), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
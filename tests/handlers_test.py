@@ -0,0 +1,101 @@
+import unittest
+from .helper import tempdir
+import json
+import os
+import sys
+import jsonschema
+from argutil import get_parser, handlers, ParserDefinition
+from argutil.defaults import DEFINITIONS_FILE
+
+HANDLER_MODULE = '''\
+IMPORTED = True
+
+
+def run(opts):
+    return ('run', opts.count)
+
+
+class Commands(object):
+    @staticmethod
+    def show(opts):
+        return 'show'
+'''
+
+
+class HandlersTest(unittest.TestCase):
+    def setUp(self):
+        self.module_name = 'argutil_test_handlers_{}'.format(id(self))
+
+    def tearDown(self):
+        sys.modules.pop(self.module_name, None)
+        for spec in list(handlers.HANDLERS):
+            if spec.startswith(self.module_name + ':'):
+                del handlers.HANDLERS[spec]
+
+    def write_definitions(self, run_handler=None, show_handler=None):
+        with open(self.module_name + '.py', 'w') as f:
+            f.write(HANDLER_MODULE)
+        sys.path.insert(0, os.getcwd())
+        self.addCleanup(sys.path.remove, os.getcwd())
+        run = {'args': [{'long': '--count', 'type': 'int'}]}
+        show = {'args': []}
+        if run_handler is not None:
+            run['handler'] = run_handler
+        if show_handler is not None:
+            show['handler'] = show_handler
+        with open(DEFINITIONS_FILE, 'w') as f:
+            f.write(json.dumps({
+                'modules': {'root': {'modules': {'run': run, 'show': show}}}
+            }))
+
+    @tempdir()
+    def test_imported_on_dispatch(self):
+        self.write_definitions(
+            self.module_name + ':run',
+            self.module_name + ':Commands.show'
+        )
+        parser = get_parser('root.py')
+        opts = parser.parse_args(['run', '--count', '2'])
+        self.assertIsInstance(opts.func, handlers.LazyHandler)
+        self.assertNotIn(self.module_name, sys.modules)
+        self.assertEqual(opts.func(opts), ('run', 2))
+        self.assertIn(self.module_name, sys.modules)
+        opts = parser.parse_args(['show'])
+        self.assertEqual(opts.func(opts), 'show')
+        self.assertIn(self.module_name + ':Commands.show', handlers.HANDLERS)
+
+    @tempdir()
+    def test_import_cache(self):
+        self.write_definitions(self.module_name + ':run')
+        spec = self.module_name + ':run'
+        handler = handlers.resolve(spec)
+        del sys.modules[self.module_name]
+        self.assertIs(handlers.resolve(spec), handler)
+        self.assertNotIn(self.module_name, sys.modules)
+
+    @tempdir()
+    def test_env_takes_precedence(self):
+        self.write_definitions(self.module_name + ':run')
+        opts = get_parser('root.py', env={'run': len}).parse_args(['run'])
+        self.assertIs(opts.func, len)
+
+    @tempdir()
+    def test_invalid_handler(self):
+        self.write_definitions('no_function_here')
+        with self.assertRaises(jsonschema.ValidationError):
+            get_parser('root.py')
+        with self.assertRaises(ValueError):
+            handlers.LazyHandler('module.only')
+
+    @tempdir()
+    def test_compiled(self):
+        self.write_definitions(self.module_name + ':run')
+        with open('root.py', 'w'):
+            pass
+        parser_def = ParserDefinition('root.py')
+        parser_def.compile()
+        opts = parser_def.get_parser().parse_args(['run', '--count', '5'])
+        self.assertEqual(opts.func, handlers.LazyHandler(
+            self.module_name + ':run'
+        ))
+        self.assertEqual(opts.func(opts), ('run', 5))
@@ -1,5 +1,6 @@
 import tempfile
 import shutil
+import json
 from contextlib import contextmanager
 import os
 from sys import stdout
@@ -7,6 +8,16 @@ import argutil
 
 WD = os.path.abspath(os.path.join('.', 'tmp'))
 
+# A script with 'run' and 'show' subcommands and a root '--name' option
+SUBCOMMANDS = {
+    'args': [{'long': '--name'}],
+    'modules': {
+        'run': {'args': [{'long': '--count', 'type': 'int'}]},
+        'show': {'args': []},
+    },
+}
+SUBCOMMANDS_DEFAULTS = {'name': 'default'}
+
 
 @contextmanager
 def TempWorkingDirectory(dir=None, cleanup=True):
@@ -37,3 +48,11 @@ def record_stdout(buf):
     setattr(stdout, 'write', new_write)
     yield
     setattr(stdout, 'write', old_write)
+
+
+def write_definitions(definition, defaults=None, module='test_script'):
+    with open(argutil.defaults.DEFINITIONS_FILE, 'w') as f:
+        json.dump({'modules': {module: definition}}, f)
+    if defaults is not None:
+        with open(argutil.defaults.DEFAULTS_FILE, 'w') as f:
+            json.dump({module: defaults}, f)
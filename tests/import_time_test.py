@@ -0,0 +1,74 @@
+import unittest
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative time for "import argutil" as reported by python -X importtime,
+# best of IMPORT_TIME_RUNS runs. Wall-clock, so only checked when
+# ARGUTIL_IMPORT_BUDGET is set (make importtime)
+IMPORT_TIME_BUDGET_US = 75000
+IMPORT_TIME_RUNS = 3
+
+DEFERRED_MODULES = ['jsonschema', 'inspect', 'shutil', 'tempfile']
+
+
+def run_python(*args):
+    process = subprocess.Popen(
+        [sys.executable] + list(args),
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    stdout, stderr = process.communicate()
+    if process.returncode:
+        raise AssertionError(stderr)
+    return stdout, stderr
+
+
+def get_import_time():
+    stderr = run_python('-X', 'importtime', '-c', 'import argutil')[1]
+    for line in stderr.splitlines():
+        fields = [f.strip() for f in line.split('|')]
+        if len(fields) == 3 and fields[2] == 'argutil':
+            return int(fields[1])
+    raise AssertionError('argutil not found in -X importtime output')
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_deferred_modules_not_imported(self):
+        stdout = run_python(
+            '-c',
+            'import sys, argutil; print(" ".join(sorted(sys.modules)))'
+        )[0]
+        imported = stdout.split()
+        for module in DEFERRED_MODULES:
+            self.assertNotIn(module, imported)
+
+    def test_schema_loaded_on_first_use(self):
+        stdout = run_python(
+            '-c',
+            'import argutil.argutil as a; '
+            'print(sorted(a.commandline_schema["definitions"]))'
+        )[0]
+        self.assertIn("'module'", stdout)
+
+    @unittest.skipUnless(
+        os.environ.get('ARGUTIL_IMPORT_BUDGET'),
+        'set ARGUTIL_IMPORT_BUDGET to check the import time budget'
+    )
+    @unittest.skipIf(
+        sys.version_info < (3, 7),
+        'python -X importtime requires Python 3.7'
+    )
+    def test_import_time_budget(self):
+        import_time = min(
+            get_import_time() for _ in range(IMPORT_TIME_RUNS)
+        )
+        self.assertLessEqual(import_time, IMPORT_TIME_BUDGET_US)
+
+
+if __name__ == '__main__':
+    unittest.main()
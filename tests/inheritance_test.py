@@ -0,0 +1,101 @@
+import unittest
+from .helper import tempdir
+from argutil import get_parser
+from argutil.defaults import DEFINITIONS_FILE
+from argutil.inheritance import TemplateResolver, resolve_definition
+import argutil
+import json
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+argutil_module = argutil.argutil
+
+
+class InheritanceTest(unittest.TestCase):
+    def test_multi_level_chain(self):
+        resolver = TemplateResolver({
+            'A': {'args': [{'long': '--a'}]},
+            'B': {'parent': 'A', 'args': [{'long': '--b'}]},
+            'C': {'parent': 'B', 'args': [{'long': '--c'}]},
+        })
+        self.assertEqual(
+            [arg['long'] for arg in resolver.get('C')['args']],
+            ['--a', '--b', '--c']
+        )
+
+    def test_child_overrides_parent_arg(self):
+        resolver = TemplateResolver({
+            'A': {'args': [{'long': '--a', 'help': ['parent']}]},
+            'B': {'parent': 'A', 'args': [{'long': '--a', 'help': ['child']}]},
+        })
+        self.assertEqual(
+            resolver.get('B')['args'],
+            ({'long': '--a', 'help': ['child']},)
+        )
+
+    def test_cycle(self):
+        resolver = TemplateResolver({
+            'A': {'parent': 'C'},
+            'B': {'parent': 'A'},
+            'C': {'parent': 'B'},
+        })
+        with self.assertRaises(ValueError):
+            resolver.get('A')
+
+    def test_unknown_parent(self):
+        resolver = TemplateResolver({'A': {'parent': 'MISSING'}})
+        with self.assertRaises(KeyError):
+            resolver.get('A')
+
+    def test_parent_from_enclosing_scope(self):
+        outer = TemplateResolver({'A': {'args': [{'long': '--a'}]}})
+        inner = TemplateResolver(
+            {'B': {'parent': 'A', 'args': [{'long': '--b'}]}},
+            outer
+        )
+        self.assertEqual(
+            [arg['long'] for arg in inner.get('B')['args']],
+            ['--a', '--b']
+        )
+
+    def test_resolved_templates_are_shared(self):
+        resolved = resolve_definition({
+            'templates': {'A': {'args': [{'long': '--a'}]}},
+            'modules': {
+                'this': {'template': 'A'},
+                'that': {'template': 'A'},
+            }
+        })
+        self.assertIs(
+            resolved['modules']['this']['args'][0],
+            resolved['modules']['that']['args'][0]
+        )
+
+    @tempdir()
+    def test_resolved_once_per_definitions_file(self):
+        json_data = {
+            'modules': {
+                'root': {
+                    'templates': {'A': {'args': [{'long': '--a'}]}},
+                    'modules': {'command': {'template': 'A'}}
+                }
+            }
+        }
+        with open(DEFINITIONS_FILE, 'w') as f:
+            f.write(json.dumps(json_data))
+        with mock.patch.object(
+            argutil_module,
+            'resolve_definition',
+            wraps=resolve_definition
+        ) as resolve:
+            get_parser('root.py')
+            parser = get_parser('root.py')
+            self.assertEqual(resolve.call_count, 1)
+        self.assertEqual(parser.parse_args(['command', '--a', '1']).a, '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from .helper import tempdir, write_definitions, SUBCOMMANDS, \
+    SUBCOMMANDS_DEFAULTS
+import json
+import os
+import subprocess
+import sys
+import argutil
+from argutil import ParserDefinition, instrument
+
+
+class InstrumentTest(unittest.TestCase):
+    def create(self):
+        write_definitions(SUBCOMMANDS, SUBCOMMANDS_DEFAULTS)
+        return ParserDefinition('test_script.py', cache=False)
+
+    def test_disabled(self):
+        self.assertIsNone(instrument.active())
+        self.assertIs(instrument.stage('load'), instrument.NULL_STAGE)
+        instrument.count('build.parsers')
+
+    @tempdir()
+    def test_report(self):
+        parser_def = self.create()
+        with instrument.profile() as profiler:
+            parser_def.parse_args(['run', '--count', '3'], lazy=True)
+        self.assertIsNone(instrument.active())
+        report = profiler.report()
+        for name in [
+            'get_parser', 'load', 'validate', 'resolve', 'build',
+            'apply_defaults', 'parse_args'
+        ]:
+            self.assertIn(name, report['stages'])
+        counters = report['counters']
+        self.assertEqual(counters['build.parsers'], 2)
+        self.assertEqual(counters['build.arguments'], 2)
+        self.assertEqual(counters['build.deferred'], 2)
+        with instrument.profile() as profiler:
+            argutil.get_parser('test_script.py').parse_args(['show'])
+        report = profiler.report()
+        self.assertEqual(report['stages']['parse_args']['calls'], 1)
+        counters = report['counters']
+        self.assertEqual(counters['resolve.hit'], 1)
+        self.assertEqual(counters['validate.hit'], 1)
+        self.assertEqual(counters['build.parsers'], 3)
+
+    @tempdir()
+    def test_chrome_trace(self):
+        parser_def = self.create()
+        with instrument.profile('profile.trace.json'):
+            parser_def.get_parser()
+        with open('profile.trace.json') as f:
+            trace = json.load(f)
+        events = trace['traceEvents']
+        self.assertTrue(events)
+        self.assertTrue(all(e['ph'] == 'X' for e in events))
+        self.assertIn('get_parser', [e['name'] for e in events])
+        self.assertIn('counters', trace['otherData'])
+
+    def test_unknown_format(self):
+        with instrument.profile() as profiler:
+            pass
+        with self.assertRaises(ValueError):
+            profiler.dumps('xml')
+
+    @tempdir()
+    def test_environ(self):
+        self.create()
+        env = dict(os.environ, **{instrument.PROFILE_ENV_VAR: 'report.json'})
+        env['PYTHONPATH'] = os.pathsep.join(
+            [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] +
+            [p for p in [env.get('PYTHONPATH')] if p]
+        )
+        subprocess.check_call([
+            sys.executable, '-c',
+            'import argutil; argutil.get_parser("test_script.py")'
+        ], env=env)
+        with open('report.json') as f:
+            report = json.load(f)
+        self.assertIn('build', report['stages'])
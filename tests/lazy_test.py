@@ -0,0 +1,89 @@
+import unittest
+from .helper import tempdir
+from argutil import get_parser
+from argutil.defaults import DEFINITIONS_FILE
+import json
+
+
+class LazyParserTest(unittest.TestCase):
+    def write_definitions(self):
+        json_data = {
+            'modules': {
+                'root': {
+                    'templates': {'BASIC': {'args': [{'long': '--foo'}]}},
+                    'modules': {
+                        'this': {
+                            'help': 'this command',
+                            'aliases': ['t'],
+                            'template': 'BASIC',
+                            'modules': {
+                                'nested': {'args': [{'long': '--bar'}]}
+                            }
+                        },
+                        'that': {
+                            'help': 'that command',
+                            'args': [{'long': '--baz'}]
+                        }
+                    }
+                }
+            }
+        }
+        with open(DEFINITIONS_FILE, 'w') as f:
+            f.write(json.dumps(json_data))
+
+    def get_choices(self, parser):
+        return parser._subparsers._group_actions[0].choices
+
+    @tempdir()
+    def test_subparsers_not_built_until_selected(self):
+        self.write_definitions()
+        parser = get_parser('root.py', lazy=True)
+        choices = self.get_choices(parser)
+        self.assertFalse(choices.is_built('this'))
+        self.assertFalse(choices.is_built('that'))
+        opts = parser.parse_args(['that', '--baz', '1'])
+        self.assertEqual(opts.baz, '1')
+        self.assertEqual(opts.command, 'that')
+        self.assertFalse(choices.is_built('this'))
+        self.assertTrue(choices.is_built('that'))
+
+    @tempdir()
+    def test_nested_subparsers(self):
+        self.write_definitions()
+        parser = get_parser('root.py', lazy=True)
+        opts = parser.parse_args(['this', '--foo', '1', 'nested'])
+        self.assertEqual(opts.foo, '1')
+        self.assertEqual(opts.command, 'nested')
+
+    @tempdir()
+    def test_aliases(self):
+        self.write_definitions()
+        parser = get_parser('root.py', lazy=True)
+        opts = parser.parse_args(['t', '--foo', '1'])
+        self.assertEqual(opts.foo, '1')
+
+    @tempdir()
+    def test_help_listing_does_not_build_subparsers(self):
+        self.write_definitions()
+        parser = get_parser('root.py', lazy=True)
+        help_text = parser.format_help()
+        self.assertIn('this command', help_text)
+        self.assertIn('that command', help_text)
+        choices = self.get_choices(parser)
+        self.assertFalse(choices.is_built('this'))
+        self.assertFalse(choices.is_built('that'))
+
+    @tempdir()
+    def test_same_help_as_eager(self):
+        self.write_definitions()
+        eager = get_parser('root.py')
+        lazy = get_parser('root.py', lazy=True)
+        self.assertEqual(lazy.format_help(), eager.format_help())
+        self.assertEqual(
+            self.get_choices(lazy)['this'].format_help(),
+            self.get_choices(eager)['this'].format_help()
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import unittest
+from .helper import tempdir
+import json
+import os
+import sys
+from argutil import get_parser, compiler, plugins, ParserDefinition
+from argutil.defaults import DEFINITIONS_FILE
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+PLUGIN_MODULE = '''\
+LOADS = []
+
+SYNC = {
+    'help': 'sync from a plugin',
+    'handler': '%(module)s:sync',
+    'args': [{'long': '--force', 'action': 'store_true'}],
+}
+
+
+def sync(opts):
+    return 'sync'
+
+
+def status():
+    LOADS.append('status')
+    return {'args': [{'long': 'target'}]}
+'''
+
+
+@unittest.skipIf(sys.version_info < (3, 8), 'requires importlib.metadata')
+class PluginsTest(unittest.TestCase):
+    def setUp(self):
+        self.module_name = 'argutil_test_plugin_{}'.format(id(self))
+        plugins._index = None
+
+    def tearDown(self):
+        plugins._index = None
+        sys.modules.pop(self.module_name, None)
+
+    def install(self, entry_points):
+        site = os.path.abspath('site')
+        dist_info = os.path.join(site, 'argutil_test_plugin-1.0.dist-info')
+        os.makedirs(dist_info)
+        with open(os.path.join(dist_info, 'METADATA'), 'w') as f:
+            f.write('Name: argutil-test-plugin\nVersion: 1.0\n')
+        with open(os.path.join(dist_info, 'entry_points.txt'), 'w') as f:
+            f.write('[{}]\n'.format(plugins.ENTRY_POINT_GROUP))
+            for name, attr in entry_points:
+                f.write('{} = {}:{}\n'.format(name, self.module_name, attr))
+        with open(os.path.join(site, self.module_name + '.py'), 'w') as f:
+            f.write(PLUGIN_MODULE % {'module': self.module_name})
+        sys.path.insert(0, site)
+        self.addCleanup(sys.path.remove, site)
+        environ = mock.patch.dict(
+            os.environ,
+            {'ARGUTIL_CACHE_DIR': os.path.abspath('cache')}
+        )
+        environ.start()
+        self.addCleanup(environ.stop)
+        return site
+
+    def write_definitions(self):
+        with open(DEFINITIONS_FILE, 'w') as f:
+            f.write(json.dumps({
+                'modules': {'root': {'modules': {'show': {'args': []}}}}
+            }))
+
+    @tempdir()
+    def test_plugin_subcommands(self):
+        self.install([('root/sync', 'SYNC'), ('other/sync', 'SYNC')])
+        self.write_definitions()
+        parser = get_parser('root.py', plugins=True)
+        opts = parser.parse_args(['sync', '--force'])
+        self.assertTrue(opts.force)
+        self.assertEqual(opts.func(opts), 'sync')
+        self.assertEqual(parser.parse_args(['show']).command, 'show')
+        with self.assertRaises(SystemExit):
+            get_parser('root.py').parse_args(['sync'])
+
+    @tempdir()
+    def test_nested_and_callable(self):
+        self.install([('root/sync', 'SYNC'), ('root/sync/status', 'status')])
+        self.write_definitions()
+        opts = get_parser('root.py', plugins=True, lazy=True).parse_args(
+            ['sync', 'status', 'here']
+        )
+        self.assertEqual(opts.target, 'here')
+
+    @tempdir()
+    def test_index_persisted(self):
+        self.install([('root/status', 'status')])
+        self.write_definitions()
+        get_parser('root.py', plugins=True)
+        self.assertEqual(sys.modules[self.module_name].LOADS, ['status'])
+        sys.modules.pop(self.module_name)
+        plugins._index = None
+        with mock.patch.object(
+            plugins, 'iter_entry_points', side_effect=AssertionError
+        ):
+            opts = get_parser('root.py', plugins=True).parse_args(
+                ['status', 'x']
+            )
+        self.assertEqual(opts.target, 'x')
+        self.assertNotIn(self.module_name, sys.modules)
+
+    @tempdir()
+    def test_index_invalidated_by_install(self):
+        site = self.install([('root/status', 'status')])
+        self.write_definitions()
+        parser_def = ParserDefinition('root.py', plugins=True)
+        parser_def.get_parser()
+        stamp = plugins._index['sources']
+        os.mkdir(os.path.join(site, 'another-1.0.dist-info'))
+        os.utime(site, (0, stamp[0][1] + 10))
+        with mock.patch.object(
+            plugins, 'iter_entry_points', return_value=[]
+        ):
+            with self.assertRaises(SystemExit):
+                parser_def.get_parser().parse_args(['status', 'x'])
+
+    @tempdir()
+    def test_compiled_module_records_plugins(self):
+        self.install([('root/sync', 'SYNC')])
+        self.write_definitions()
+        compiled_file = ParserDefinition('root.py').compile()
+        key = plugins.get_key()
+        self.assertIsNotNone(compiler.load(compiled_file, 'root'))
+        self.assertIsNone(compiler.load(compiled_file, 'root', key))
+        opts = get_parser('root.py', plugins=True).parse_args(['sync'])
+        self.assertEqual(opts.func(opts), 'sync')
+        ParserDefinition('root.py', plugins=True).compile()
+        self.assertIsNone(compiler.load(compiled_file, 'root'))
+        self.assertIsNotNone(compiler.load(compiled_file, 'root', key))
+        with self.assertRaises(SystemExit):
+            get_parser('root.py').parse_args(['sync'])
+
+    @tempdir()
+    def test_script_directory_changes_keep_compiled_module(self):
+        site = self.install([('root/sync', 'SYNC')])
+        self.write_definitions()
+        script_dir = os.path.abspath('.')
+        sys.path.insert(0, script_dir)
+        self.addCleanup(sys.path.remove, script_dir)
+        parser_def = ParserDefinition('root.py', plugins=True)
+        compiled_file = parser_def.compile()
+        with open('other.py', 'w') as f:
+            f.write('')
+        self.assertIsNotNone(
+            compiler.load(compiled_file, 'root', plugins.get_key())
+        )
+        os.mkdir(os.path.join(site, 'another-1.0.dist-info'))
+        self.assertIsNone(
+            compiler.load(compiled_file, 'root', plugins.get_key())
+        )
+
+    @tempdir()
+    def test_defined_module_wins(self):
+        self.install([('root/show', 'status')])
+        self.write_definitions()
+        opts = get_parser('root.py', plugins=True).parse_args(['show'])
+        self.assertFalse(hasattr(opts, 'target'))
@@ -0,0 +1,82 @@
+import unittest
+import threading
+from argutil import Registry, registry
+from argutil.registry import Environment
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class RegistryTest(unittest.TestCase):
+    def test_callable(self):
+        registry = Registry()
+
+        @registry.callable()
+        def foo():
+            pass
+
+        @registry.callable('baz')
+        def bar():
+            pass
+
+        self.assertEqual(dict(registry), {'foo': foo, 'baz': bar})
+
+    def test_scope_falls_back_to_parent(self):
+        parent = Registry({'a': 1, 'b': 2})
+        child = parent.scope({'b': 3})
+        parent['c'] = 4
+        self.assertEqual(dict(child), {'a': 1, 'b': 3, 'c': 4})
+        self.assertNotIn('b', child.scope().maps()[0])
+        del child['b']
+        self.assertEqual(child['b'], 2)
+
+    def test_snapshot_unaffected_by_later_writes(self):
+        registry = Registry({'a': 1})
+        snapshot = registry.snapshot()
+        registry['a'] = 2
+        registry['b'] = 3
+        self.assertEqual(dict(snapshot), {'a': 1})
+        self.assertEqual(dict(registry), {'a': 2, 'b': 3})
+
+    def test_environment_format(self):
+        env = Environment({'a': 'x'}, Registry({'a': 'y', 'b': 'z'}))
+        self.assertEqual(env.format('{a}{b}'), 'xz')
+        with self.assertRaises(KeyError):
+            env.format('{c}')
+
+    def test_environment_format_cached(self):
+        env = Environment({'a': 'x'})
+        with mock.patch.object(
+            registry._formatter, 'vformat', wraps=registry._formatter.vformat
+        ) as vformat:
+            self.assertEqual(env.format('{a}!'), 'x!')
+            self.assertEqual(env.format('{a}!'), 'x!')
+            self.assertEqual(env.format('no fields'), 'no fields')
+            self.assertEqual(vformat.call_count, 1)
+
+    def test_shared_environment(self):
+        reg = Registry({'a': 'x'})
+        self.assertIs(reg.snapshot(), reg.snapshot())
+        env = reg.snapshot()
+        reg['a'] = 'y'
+        self.assertIsNot(reg.snapshot(), env)
+        self.assertEqual(reg.snapshot().format('{a}'), 'y')
+        self.assertEqual(env.format('{a}'), 'x')
+
+    def test_concurrent_registration(self):
+        registry = Registry()
+
+        def worker(index):
+            for i in range(100):
+                registry['{}-{}'.format(index, i)] = i
+
+        threads = [
+            threading.Thread(target=worker, args=(i,)) for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(registry), 800)
@@ -0,0 +1,111 @@
+import unittest
+from .helper import tempdir, write_definitions
+import os
+import pickle
+from argparse import Namespace
+from argutil import ParserDefinition, results
+
+DEFINITIONS = {
+    'args': [{'long': '--name'}],
+    'modules': {
+        'run': {
+            'args': [
+                {'long': '--count', 'short': '-c', 'type': 'int'},
+                {'long': '--dry-run', 'action': 'store_true'},
+                {'long': 'target'},
+            ],
+        },
+        'show': {
+            'args': [
+                {'long': '-v', 'dest': 'verbose', 'action': 'count'},
+            ],
+        },
+    },
+}
+
+
+class ResultsTest(unittest.TestCase):
+    def create(self):
+        write_definitions(DEFINITIONS, {'name': 'default'})
+        return ParserDefinition('test_script.py')
+
+    @tempdir()
+    def test_slotted_results(self):
+        parser_def = self.create()
+        parser_def.env['run'] = len
+        opts = parser_def.parse_args(
+            ['run', '-c', '3', '--dry-run', 'x'],
+            slots=True
+        )
+        self.assertIsInstance(opts, results.Result)
+        self.assertFalse(hasattr(opts, '__dict__'))
+        self.assertEqual(type(opts).__name__, 'Namespace_test_script_run')
+        self.assertEqual(
+            sorted(type(opts).__slots__),
+            ['command', 'count', 'dry_run', 'func', 'name', 'target']
+        )
+        self.assertEqual(opts, parser_def.parse_args(
+            ['run', '-c', '3', '--dry-run', 'x']
+        ))
+        self.assertEqual((opts.count, opts.target), (3, 'x'))
+        with self.assertRaises(AttributeError):
+            opts.other = 1
+
+    @tempdir()
+    def test_count_dest(self):
+        parser_def = self.create()
+        opts = parser_def.parse_args(['show', '-vv'], slots=True)
+        self.assertEqual(type(opts).__name__, 'Namespace_test_script_show')
+        self.assertEqual(opts.verbose, 2)
+
+    def test_unknown_fields(self):
+        types = results.ResultTypes('script', {'args': []}, {})
+        opts = types.convert(Namespace(extra=1))
+        self.assertEqual(type(opts).__slots__, ('extra',))
+        self.assertIn('extra', opts)
+        del opts.extra
+        self.assertNotIn('extra', opts)
+        self.assertEqual(pickle.loads(pickle.dumps(opts)), opts)
+
+    @tempdir()
+    def test_pickle(self):
+        parser_def = self.create()
+        parser_def.env['run'] = len
+        argv = ['run', '-c', '3', 'x']
+        opts = parser_def.parse_args(argv, slots=True)
+        data = pickle.dumps(opts, pickle.HIGHEST_PROTOCOL)
+        self.assertEqual(pickle.loads(data), opts)
+        self.assertLess(
+            len(data),
+            len(pickle.dumps(parser_def.parse_args(argv), 2))
+        )
+
+    def test_invalid_identifier(self):
+        namespace = Namespace(**{'not-an-identifier': 1})
+        types = results.ResultTypes('script', {'args': []}, {})
+        self.assertIs(types.convert(namespace), namespace)
+
+    def test_get_dest(self):
+        self.assertEqual(
+            results.get_dest({'long': '--dry-run', 'short': '-d'}),
+            'dry_run'
+        )
+        self.assertEqual(results.get_dest({'long': '-x', 'short': '-y'}), 'y')
+        self.assertEqual(results.get_dest({'long': 'pos-arg'}), 'pos-arg')
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    @tempdir()
+    def test_parse_all(self):
+        parser_def = self.create()
+        argvs = [['run', '-c', str(i), 'x'] for i in range(20)]
+        for processes in [None, 2]:
+            parsed = list(parser_def.parse_all(
+                argvs, processes=processes, slots=True
+            ))
+            self.assertTrue(all(
+                isinstance(opts, results.Result) for opts in parsed
+            ))
+            self.assertEqual(
+                [opts.count for opts in parsed],
+                list(range(20))
+            )
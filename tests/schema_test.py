@@ -0,0 +1,124 @@
+import unittest
+from .helper import tempdir
+import json
+import os
+import argutil
+from argutil import ParserDefinition, schema
+from argutil.defaults import DEFINITIONS_FILE
+from jsonschema import ValidationError
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+try:
+    FileNotFoundError
+except NameError:
+    FileNotFoundError = IOError
+
+
+class SchemaTest(unittest.TestCase):
+    def setUp(self):
+        schema._valid_fingerprints.clear()
+
+    def write_definitions(self, json_data):
+        with open(DEFINITIONS_FILE, 'w') as f:
+            f.write(json.dumps(json_data))
+        return os.path.abspath(DEFINITIONS_FILE)
+
+    def test_validator_is_reused(self):
+        self.assertIs(schema.get_validator(), schema.get_validator())
+
+    def test_check_raises_validation_error(self):
+        with self.assertRaises(ValidationError):
+            schema.check({'bad_def': {}})
+
+    @tempdir()
+    def test_unchanged_file_is_validated_once(self):
+        path = self.write_definitions({'modules': {}})
+        with mock.patch.object(schema, 'check') as check:
+            schema.validate_file(path)
+            schema.validate_file(path)
+            self.assertEqual(check.call_count, 1)
+
+    @tempdir()
+    def test_changed_file_is_revalidated(self):
+        path = self.write_definitions({'modules': {}})
+        schema.validate_file(path)
+        self.write_definitions({'bad_def': {}})
+        with self.assertRaises(ValidationError):
+            schema.validate_file(path)
+
+    @tempdir()
+    def test_sidecar_fingerprint(self):
+        path = self.write_definitions({'modules': {}})
+        cache_dir = os.path.abspath('cache')
+        schema.validate_file(path, cache_dir)
+        self.assertTrue(
+            os.path.isfile(schema.get_sidecar_path(path, cache_dir))
+        )
+        schema._valid_fingerprints.clear()
+        with mock.patch.object(schema, 'check') as check:
+            schema.validate_file(path, cache_dir)
+            self.assertFalse(check.called)
+
+    @tempdir()
+    def test_saved_definitions_are_not_revalidated(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        parser_def.add_argument('--foo')
+        with mock.patch.object(schema, 'check') as check:
+            parser_def.get_parser()
+            self.assertFalse(check.called)
+
+    @tempdir()
+    def test_edit_validates_module_only(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        with mock.patch.object(schema, 'check') as check:
+            with mock.patch.object(
+                schema, 'check_module', wraps=schema.check_module
+            ) as check_module:
+                parser_def.add_argument('--foo')
+                parser_def.add_example('--foo bar')
+                self.assertEqual(check_module.call_count, 2)
+            self.assertFalse(check.called)
+
+    @tempdir()
+    def test_edit_invalid_module(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        with self.assertRaises(ValidationError):
+            parser_def.add_argument('--foo', nargs=2)
+
+    @tempdir()
+    def test_edit_ignores_other_modules(self):
+        self.write_definitions({
+            'modules': {
+                'test_script': {'args': [], 'examples': []},
+                'other_script': {'args': [{'help': ['missing long']}]}
+            }
+        })
+        parser_def = ParserDefinition('test_script.py')
+        parser_def.add_argument('--foo')
+        with self.assertRaises(ValidationError):
+            parser_def.validate()
+        with self.assertRaises(ValidationError):
+            parser_def.get_parser()
+
+    @tempdir()
+    def test_edit_of_valid_file_stays_valid(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        schema._valid_fingerprints.clear()
+        parser_def.validate()
+        parser_def.add_argument('--foo')
+        with mock.patch.object(schema, 'check') as check:
+            parser_def.get_parser()
+            self.assertFalse(check.called)
+
+    @tempdir()
+    def test_validate_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            argutil.argutil.validate('missing.json')
+
+
+if __name__ == '__main__':
+    unittest.main()
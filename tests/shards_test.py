@@ -0,0 +1,154 @@
+import unittest
+from .helper import tempdir
+import json
+import os
+import argutil
+from argutil import ParserDefinition, shards
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+DEFINITIONS = {
+    'modules': {
+        'test_script': {
+            'templates': {'base': {'args': [{'long': '--base'}]}},
+            'args': [{'long': '--foo'}],
+            'modules': {
+                'sub': {
+                    'template': 'base',
+                    'args': [{'long': '--bar'}],
+                    'modules': {'leaf': {'args': [{'long': '--baz'}]}},
+                },
+                'other': {'args': []},
+            },
+        },
+        'other_script': {'examples': [], 'args': [{'long': '--qux'}]},
+    },
+}
+
+
+class ShardsTest(unittest.TestCase):
+    def read(self, filepath):
+        with open(filepath) as f:
+            return json.load(f)
+
+    def split(self):
+        with open('commandline.json', 'w') as f:
+            json.dump(DEFINITIONS, f)
+        return shards.split('commandline.json', 'commandline.d')
+
+    @tempdir()
+    def test_split(self):
+        self.split()
+        self.assertEqual(
+            list(self.read('commandline.d/index.json')['modules']),
+            [
+                'test_script',
+                'test_script/sub',
+                'test_script/sub/leaf',
+                'test_script/other',
+                'other_script',
+            ]
+        )
+        self.assertNotIn(
+            'modules',
+            self.read('commandline.d/test_script.json')
+        )
+        self.assertEqual(
+            self.read('commandline.d/test_script/sub/leaf.json'),
+            {'args': [{'long': '--baz'}]}
+        )
+
+    @tempdir()
+    def test_get_parser(self):
+        self.split()
+        parser = argutil.get_parser(
+            'test_script.py',
+            definitions_file='commandline.d'
+        )
+        opts = parser.parse_args(['sub', '--base', 'a', 'leaf', '--baz', 'b'])
+        self.assertEqual((opts.base, opts.baz), ('a', 'b'))
+        self.assertEqual(
+            list(parser._subparsers._group_actions[0].choices),
+            ['sub', 'other']
+        )
+
+    @tempdir()
+    def test_get_parser_reads_only_own_shards(self):
+        self.split()
+        parser_def = ParserDefinition(
+            'other_script.py',
+            definitions_file='commandline.d'
+        )
+        with mock.patch.object(
+            argutil.schema, 'read_validated',
+            wraps=argutil.schema.read_validated
+        ) as read_validated:
+            parser = parser_def.get_parser()
+            self.assertEqual(
+                [os.path.basename(c[0][0])
+                 for c in read_validated.call_args_list],
+                ['other_script.json']
+            )
+        self.assertEqual(parser.parse_args(['--qux', 'x']).qux, 'x')
+
+    @tempdir()
+    def test_edits_write_only_own_shard(self):
+        self.split()
+        before = self.read('commandline.d/test_script.json')
+        parser_def = ParserDefinition(
+            'other_script.py',
+            definitions_file='commandline.d'
+        )
+        parser_def.add_argument('--quux')
+        parser_def.add_example('--quux 1', 'example')
+        self.assertEqual(self.read('commandline.d/test_script.json'), before)
+        shard = self.read('commandline.d/other_script.json')
+        self.assertEqual(shard['args'][-1]['long'], '--quux')
+        self.assertEqual(shard['examples'][0]['usage'], '--quux 1')
+        parser = parser_def.get_parser()
+        self.assertEqual(parser.parse_args(['--quux', 'y']).quux, 'y')
+
+    @tempdir()
+    def test_create_and_delete(self):
+        os.mkdir('commandline.d')
+        parser_def = ParserDefinition.create(
+            'test_script.py',
+            definitions_file='commandline.d'
+        )
+        parser_def.add_argument('--foo')
+        self.assertEqual(
+            self.read('commandline.d/index.json'),
+            {'modules': {'test_script': 'test_script.json'}}
+        )
+        self.assertEqual(
+            parser_def.get_parser().parse_args(['--foo', 'x']).foo,
+            'x'
+        )
+        parser_def.validate()
+        with self.assertRaises(KeyError):
+            ParserDefinition.create(
+                'test_script.py',
+                definitions_file='commandline.d'
+            )
+        parser_def.delete()
+        self.assertEqual(
+            self.read('commandline.d/index.json'),
+            {'modules': {}}
+        )
+        self.assertFalse(os.path.exists('commandline.d/test_script.json'))
+
+    @tempdir()
+    def test_delete_removes_submodule_shards(self):
+        self.split()
+        ParserDefinition(
+            'test_script.py',
+            definitions_file='commandline.d'
+        ).delete()
+        self.assertEqual(
+            list(self.read('commandline.d/index.json')['modules']),
+            ['other_script']
+        )
+        self.assertFalse(os.path.exists('commandline.d/test_script/sub.json'))
@@ -0,0 +1,68 @@
+import unittest
+from .helper import tempdir
+import os
+from argutil import ParserDefinition, backend, cache, snapshot
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_round_trip(self):
+        data = {
+            'args': ({'long': '--foo', 'help': ['a', 'b']},),
+            'defaults': {'foo': 1, 'bar': 1.5, 'baz': None, 'flag': True},
+        }
+        self.assertEqual(snapshot.loads(snapshot.dumps(data)), data)
+
+    def test_incompatible_header_rejected(self):
+        data = snapshot.dumps({'a': 1})
+        with self.assertRaises(ValueError):
+            snapshot.loads(b'{"a": 1}')
+        with self.assertRaises(ValueError):
+            snapshot.loads(data[:len(snapshot.MAGIC)] + b'\xff' + data[9:])
+
+    @tempdir()
+    def test_read_invalid_file(self):
+        self.assertIsNone(snapshot.read('missing.snapshot'))
+        with open('bad.snapshot', 'wb') as f:
+            f.write(snapshot.dumps({'a': 1})[:-2])
+        self.assertIsNone(snapshot.read('bad.snapshot'))
+
+    @tempdir()
+    def test_cache_entry_is_snapshot(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        parser_def.add_argument('--foo')
+        ParserDefinition('test_script.py', cache=True).get_parser()
+        entries = [
+            os.path.join(cache.PYCACHE_DIR, f)
+            for f in os.listdir(cache.PYCACHE_DIR)
+            if f.endswith('.snapshot')
+        ]
+        self.assertEqual(len(entries), 1)
+        entry = snapshot.read(entries[0])
+        self.assertEqual(entry['version'], cache.CACHE_VERSION)
+        self.assertEqual(entry['definition']['args'][0]['long'], '--foo')
+
+
+class BackendTest(unittest.TestCase):
+    def setUp(self):
+        self.environ = dict(os.environ)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+
+    def test_json_backend(self):
+        loads = backend.get_loads('json')
+        self.assertEqual(loads(b'{"a": [1, 2.5]}'), {'a': [1, 2.5]})
+        self.assertEqual(loads('{"a": null}'), {'a': None})
+
+    def test_backend_from_environment(self):
+        os.environ[backend.BACKEND_ENV_VAR] = 'json'
+        self.assertEqual(backend.get_loads()(b'[]'), [])
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            backend.get_loads('yaml')
+
+    def test_default_backend(self):
+        os.environ.pop(backend.BACKEND_ENV_VAR, None)
+        self.assertEqual(backend.get_loads()(b'{"a": "b"}'), {'a': 'b'})
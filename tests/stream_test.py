@@ -0,0 +1,78 @@
+import unittest
+from .helper import tempdir
+import json
+import argutil
+from argutil import ParserDefinition, schema, stream
+from jsonschema import ValidationError
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+DEFINITIONS = {
+    'modules': {
+        'before': {'args': [{'long': '--x', 'help': ['a "quoted" {}']}]},
+        'test_script': {
+            'templates': {'base': {'args': [{'long': '--base'}]}},
+            'args': [{'long': '--foo'}],
+            'modules': {'sub': {'template': 'base'}},
+        },
+        'after': {'args': 'not a list'},
+    },
+}
+
+
+class StreamTest(unittest.TestCase):
+    def write(self, json_data, indent=2):
+        with open('commandline.json', 'w') as f:
+            json.dump(json_data, f, indent=indent)
+
+    def test_extract(self):
+        text = json.dumps(DEFINITIONS)
+        value, source = stream.extract(text, ['modules', 'test_script'])
+        self.assertEqual(value, DEFINITIONS['modules']['test_script'])
+        self.assertEqual(json.loads(source), value)
+        self.assertIsNone(stream.extract(text, ['modules', 'missing']))
+        self.assertIsNone(stream.extract('{"modules": {}}', ['modules', 'a']))
+
+    def test_extract_invalid(self):
+        with self.assertRaises(ValueError):
+            stream.extract('{"modules" {}}', ['modules', 'a'])
+        with self.assertRaises(ValueError):
+            stream.extract('{"modules": {"a": 1 "b": 2}}', ['modules', 'b'])
+
+    @tempdir()
+    def test_get_parser(self):
+        self.write(DEFINITIONS)
+        with mock.patch.object(schema, 'check') as check:
+            parser = argutil.get_parser('test_script.py', stream=True)
+            self.assertFalse(check.called)
+        opts = parser.parse_args(['--foo', 'a', 'sub', '--base', 'b'])
+        self.assertEqual((opts.foo, opts.base), ('a', 'b'))
+
+    @tempdir()
+    def test_invalid_module_rejected(self):
+        self.write(DEFINITIONS)
+        with self.assertRaises(ValidationError):
+            argutil.get_parser('after.py', stream=True)
+
+    @tempdir()
+    def test_missing_module(self):
+        self.write(DEFINITIONS)
+        with self.assertRaises(KeyError):
+            argutil.get_parser('missing.py', stream=True)
+
+    @tempdir()
+    def test_stream_large_files_by_default(self):
+        json_data = json.loads(json.dumps(DEFINITIONS))
+        del json_data['modules']['after']
+        self.write(json_data, indent=None)
+        parser_def = ParserDefinition('test_script.py')
+        with mock.patch.object(stream, 'read_module') as read_module:
+            read_module.return_value = ({'args': []}, 'fingerprint')
+            parser_def.get_parser()
+            self.assertFalse(read_module.called)
+            with mock.patch.object(stream, 'STREAM_THRESHOLD', 16):
+                parser_def.get_parser()
+            self.assertTrue(read_module.called)
@@ -0,0 +1,64 @@
+import unittest
+from .helper import tempdir
+import os
+import threading
+import argutil
+from argutil import ParserDefinition
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def fail_chdir(path):
+    raise AssertionError('os.chdir called')
+
+
+class ThreadSafetyTest(unittest.TestCase):
+    @tempdir()
+    def test_no_chdir(self):
+        with mock.patch.object(os, 'chdir', fail_chdir):
+            parser_def = ParserDefinition.create(
+                os.path.abspath('test_script.py')
+            )
+            parser_def.add_argument('--foo')
+            parser_def.set_defaults(foo='bar')
+            parser = argutil.get_parser(os.path.abspath('test_script.py'))
+        self.assertEqual(parser.parse_args([]).foo, 'bar')
+
+    @tempdir()
+    def test_get_parser_from_threads(self):
+        scripts = [os.path.abspath('script{}.py'.format(i)) for i in range(8)]
+        for i, script in enumerate(scripts):
+            parser_def = ParserDefinition.create(script)
+            parser_def.add_argument('--foo', default=str(i))
+        results = {}
+        errors = []
+
+        def worker(index):
+            try:
+                for _ in range(10):
+                    parser = argutil.get_parser(scripts[index], lazy=True)
+                    results[index] = parser.parse_args([]).foo
+            except Exception as e:
+                errors.append(e)
+
+        with mock.patch.object(os, 'chdir', fail_chdir):
+            threads = [
+                threading.Thread(target=worker, args=(i,))
+                for i in range(len(scripts))
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            results,
+            {i: str(i) for i in range(len(scripts))}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
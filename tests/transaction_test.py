@@ -0,0 +1,92 @@
+import unittest
+from .helper import tempdir
+import argutil
+from argutil import ParserDefinition, schema
+from jsonschema import ValidationError
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+argutil_module = argutil.argutil
+
+
+class TransactionTest(unittest.TestCase):
+    def read(self, filepath):
+        with open(filepath) as f:
+            return f.read()
+
+    @tempdir()
+    def test_single_write_per_file(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        with mock.patch.object(
+            argutil_module, 'save', wraps=argutil_module.save
+        ) as save:
+            with parser_def.transaction():
+                for i in range(10):
+                    parser_def.add_argument('--arg{}'.format(i))
+                parser_def.add_example('--arg0 1')
+                parser_def.set_defaults(arg0='a', arg1='b')
+            self.assertEqual(save.call_count, 2)
+        parser = parser_def.get_parser()
+        opts = parser.parse_args(['--arg9', 'c'])
+        self.assertEqual((opts.arg0, opts.arg1, opts.arg9), ('a', 'b', 'c'))
+
+    @tempdir()
+    def test_single_validation(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        with mock.patch.object(
+            schema, 'check_module', wraps=schema.check_module
+        ) as check_module:
+            with parser_def.transaction():
+                for i in range(10):
+                    parser_def.add_argument('--arg{}'.format(i))
+            self.assertEqual(check_module.call_count, 1)
+
+    @tempdir()
+    def test_rollback_on_error(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        definitions = self.read(parser_def.definitions_file)
+        with self.assertRaises(RuntimeError):
+            with parser_def.transaction():
+                parser_def.add_argument('--foo')
+                parser_def.set_defaults(foo='bar')
+                raise RuntimeError()
+        self.assertEqual(self.read(parser_def.definitions_file), definitions)
+        self.assertDictEqual(parser_def.get_defaults(), {})
+
+    @tempdir()
+    def test_validation_error_writes_nothing(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        definitions = self.read(parser_def.definitions_file)
+        with self.assertRaises(ValidationError):
+            with parser_def.transaction():
+                parser_def.set_defaults(foo='bar')
+                parser_def.add_argument('--foo', choices=[1, 2])
+        self.assertEqual(self.read(parser_def.definitions_file), definitions)
+        self.assertDictEqual(parser_def.get_defaults(), {})
+
+    @tempdir()
+    def test_reads_see_pending_edits(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        with parser_def.transaction():
+            parser_def.set_defaults(foo='bar')
+            self.assertDictEqual(parser_def.get_defaults(), {'foo': 'bar'})
+            self.assertEqual(parser_def.config(), ['foo=bar'])
+
+    @tempdir()
+    def test_nested_transactions_commit_once(self):
+        parser_def = ParserDefinition.create('test_script.py')
+        with mock.patch.object(
+            argutil_module, 'save', wraps=argutil_module.save
+        ) as save:
+            with parser_def.transaction():
+                with parser_def.transaction():
+                    parser_def.add_argument('--foo')
+                parser_def.add_argument('--bar')
+            self.assertEqual(save.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 from .helper import WD
 import os
 from argutil import WorkingDirectory, pushd
+from argutil.working_directory import resolve_path
 
 
 class WorkingDirectoryTest(unittest.TestCase):
@@ -34,6 +35,28 @@ class WorkingDirectoryTest(unittest.TestCase):
         self.assertIs(os.path.isfile(filename), False)
         in_wd()
 
+    def test_resolve_path_from_file(self):
+        filepath = os.path.join(WD, 'script.py')
+        self.assertEqual(
+            resolve_path(filepath, 'commandline.json'),
+            os.path.join(WD, 'commandline.json')
+        )
+
+    def test_resolve_path_from_directory(self):
+        self.assertEqual(
+            resolve_path(WD, os.path.join('..', 'commandline.json')),
+            os.path.join(os.path.dirname(WD), 'commandline.json')
+        )
+
+    def test_resolve_path_absolute(self):
+        path = os.path.abspath(os.path.join(os.sep, 'commandline.json'))
+        self.assertEqual(resolve_path(WD, path), path)
+
+    def test_resolve_path_does_not_chdir(self):
+        cwd = os.getcwd()
+        resolve_path(WD, 'commandline.json')
+        self.assertEqual(os.getcwd(), cwd)
+
 
 if __name__ == '__main__':
     unittest.main()